@@ -1,13 +1,145 @@
 #!python
-"""Impfix main. Add Open Flight Maps data to X-Plane."""
+"""Impfix main. Add Open Flight Maps data to X-Plane.
 
+Command line:
+    impfix.py [options] ofmfile     (see impfix.py --help)
+
+Library:
+    from settings import SettingsClass
+    import impfix
+
+    impfix_settings = SettingsClass('ofmx_lo.ofmx', '/Applications/X-Plane 11')
+    with impfix.load_snapshot(impfix_settings) as ofmx_data:
+        impfix.generate_user_fix(impfix_settings, ofmx_data)
+
+    shapes = impfix.load_shapes(impfix_settings, 'ofmx_lo_ofmShapeExtension.xml',
+                                tolerance=0.001)
+
+The modules doing the work (XML parsing, writing, export) are imported
+only when they are needed, so --help and --version start fast.
+
+Errors are raised as ImpfixError (see impfix_errors.py); only main()
+prints them and exits.
+"""
+
+import os
+import sys
+
+from impfix_errors import ImpfixError
 from settings import SettingsClass
-from xplane_navdata import XPlaneNavDataClass
-from ofmx_data import OFMXFileClass
-
-settings = SettingsClass()
-print(settings.impfix_hello)
-ofmxdata = OFMXFileClass(settings)
-ofmxdata.read_and_parse()
-navdata = XPlaneNavDataClass(settings)
-navdata.write_new_user_fix_dat_file(ofmxdata)
+
+def load_snapshot(impfix_settings: SettingsClass):
+    """Read and parse the OFMX file of the settings.
+
+    Args:
+        impfix_settings (SettingsClass): settings
+
+    Returns:
+        OFMXFileClass: the parsed OFMX data (OFMXChunkedFileClass if
+            the settings have a memory budget); the caller has to
+            close() it, e.g. with a with statement
+
+    Raises:
+        ImpfixError: the OFMX file cannot be read or is not valid
+    """
+    if impfix_settings.max_memory:
+        from ofmx_chunked import OFMXChunkedFileClass as OFMXFileClass
+    else:
+        from ofmx_data import OFMXFileClass
+
+    ofmx_data = OFMXFileClass(impfix_settings)
+    try:
+        ofmx_data.read_and_parse()
+    except:
+        ofmx_data.close()
+        raise
+    return ofmx_data
+
+def load_shapes(impfix_settings: SettingsClass, shape_file_name: str,
+                tolerance: float = 0.0):
+    """Read and parse the airspace shapes of an OFM shape extension file.
+
+    The file is validated if requested by the settings.
+
+    Args:
+        impfix_settings (SettingsClass): settings
+        shape_file_name (str): name of the shape extension file
+        tolerance (float): Douglas-Peucker tolerance in degrees for the
+            simplification of the shapes; 0 = no simplification
+
+    Returns:
+        OFMXShapeClass: the parsed shapes (see get_shape())
+
+    Raises:
+        ImpfixError: the shape extension file cannot be read or is not
+            valid
+    """
+    from ofmx_shapes import OFMXShapeClass
+    from ofmx_validator import OFMXValidatorClass
+
+    validator = None
+    if impfix_settings.validate:
+        validator = OFMXValidatorClass(shape_file_name, impfix_settings.max_errors)
+    shapes = OFMXShapeClass(impfix_settings, shape_file_name, tolerance, validator)
+    shapes.read_and_parse()
+    return shapes
+
+def generate_user_fix(impfix_settings: SettingsClass, ofmx_data=None) -> None:
+    """Create the new user_fix.dat file and the binary navdata export.
+
+    Args:
+        impfix_settings (SettingsClass): settings
+        ofmx_data (OFMXFileClass): parsed OFMX data, e.g. from
+            load_snapshot(); if None the OFMX file of the settings is
+            read (pipelined if requested by the settings, no memory
+            budget is set and there is more than one CPU) and closed
+            afterwards
+
+    Raises:
+        ImpfixError: a file cannot be read or written, or the OFMX
+            file is not valid
+    """
+    from xplane_navdata import XPlaneNavDataClass
+
+    created = ofmx_data is None
+    if created:
+        if impfix_settings.pipeline and not impfix_settings.max_memory \
+                and (os.cpu_count() or 1) > 1:
+            # Parse the OFMX file while the old user_fix.dat is copied.
+            # The pipeline keeps all reporting points in memory, so it
+            # is not used with a memory budget, and it needs a second
+            # CPU to gain anything.
+            from ofmx_pipeline import OFMXPipelineClass
+            ofmx_data = OFMXPipelineClass(impfix_settings)
+            ofmx_data.start()
+        else:
+            ofmx_data = load_snapshot(impfix_settings)
+    try:
+        navdata = XPlaneNavDataClass(impfix_settings)
+        navdata.write_new_user_fix_dat_file(ofmx_data)
+        if impfix_settings.export_file_name:
+            from navdata_binary import NavdataBinaryExportClass
+            NavdataBinaryExportClass(impfix_settings).write(ofmx_data)
+    finally:
+        if created:
+            ofmx_data.close()
+
+def main(argv: list = None) -> None:
+    """Impfix command line entry point.
+
+    Prints the error message and exits with exit status 1 on errors.
+    """
+    impfix_settings = SettingsClass.from_command_line(argv)
+    print(impfix_settings.impfix_hello)
+    try:
+        generate_user_fix(impfix_settings)
+    except ImpfixError as e:
+        for line in e.args:
+            print('**{}'.format(line))
+        sys.exit(1)
+    except Exception:
+        print('**Unknown error: ', sys.exc_info()[0:2])
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
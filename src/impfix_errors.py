@@ -0,0 +1,18 @@
+"""
+Exceptions of Impfix.
+
+The library code raises ImpfixError instead of printing the error and
+stopping the program. Only the command line entry point impfix.main()
+prints the error message and exits.
+"""
+
+class ImpfixError(Exception):
+    """Error which stops the processing of the OFMX data.
+
+    The arguments are the lines of the error message, e.g.
+    ImpfixError('I/O error(2): No such file or directory',
+                'File not found: ofmx_lo.ofmx')
+    """
+
+    def __str__(self) -> str:
+        return '\n'.join(str(line) for line in self.args)
@@ -0,0 +1,292 @@
+"""
+Binary columnar export of the processed reporting points.
+
+Downstream tools (moving map, route checker, ...) need the reporting
+points with their shortened ids and coordinates without re-parsing
+the user_fix.dat file or the OFMX file.
+
+File layout (all values little endian, all columns 8-byte aligned):
+
+    Header
+        magic               8 bytes     b'IMPFIXNB'
+        version             uint16
+        reserved            uint16
+        rp_count            uint32      number of reporting points
+        string_count        uint32      number of interned strings
+        effective           32 bytes    effective date of the OFMX data
+                                        (ASCII, padded with 0x00)
+        column offsets      uint64[]    one offset per column, in the
+                                        order of NAVDATA_COLUMNS
+    Columns
+        lat, long           float64[rp_count]
+        region, airport,
+        rp_id, rp_type,
+        rp_name, rp_id5,
+        region2             uint32[rp_count]  index into string table
+        string_offsets      uint32[string_count + 1]
+        string_data         UTF-8 bytes of all interned strings
+
+Writing only needs the standard library. Loading memory-maps the file
+and needs NumPy, which is imported on first use only.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import settings
+from impfix_errors import ImpfixError
+
+## Magic bytes at the beginning of a binary navdata file
+NAVDATA_MAGIC: bytes = b'IMPFIXNB'
+## Version of the binary navdata file format
+NAVDATA_VERSION: int = 1
+## Column names in file order: (name, typecode of array module)
+NAVDATA_COLUMNS: tuple = (
+    ('lat', 'd'), ('long', 'd'),
+    ('region', 'I'), ('airport', 'I'), ('rp_id', 'I'), ('rp_type', 'I'),
+    ('rp_name', 'I'), ('rp_id5', 'I'), ('region2', 'I'),
+    ('string_offsets', 'I'), ('string_data', 'B'))
+## Columns which are indices into the string table
+NAVDATA_STRING_COLUMNS: tuple = ('region', 'airport', 'rp_id', 'rp_type',
+                                 'rp_name', 'rp_id5', 'region2')
+
+## Header including the column offsets
+_HEADER_STRUCT = struct.Struct('<8sHHII32s' + 'Q' * len(NAVDATA_COLUMNS))
+
+
+def _align(offset: int) -> int:
+    """Return the offset rounded up to the next multiple of 8."""
+    return (offset + 7) & ~7
+
+
+def _coord(value: str) -> float:
+    """Convert a coordinate string to float (NaN if not available)."""
+    try:
+        return float(value)
+    except ValueError:
+        return float('nan')
+
+
+class NavdataBinaryExportClass:
+    """Write the processed reporting points into a binary navdata file."""
+    ## Name extension of the file written before it replaces the old file
+    __cls_temp_name_ext: str = '.tmp'
+
+    def __init__(self, impfix_settings: settings.SettingsClass) -> None:
+        ## Settings
+        self.__settings_object: settings.SettingsClass = impfix_settings
+
+    def write(self, ofmx_data, filename: str = '') -> None:
+        """Write the reporting points of ofmx_data into the binary file.
+
+        Args:
+            ofmx_data: OFMXFileClass object (or an object with the same
+                interface) with the parsed reporting points
+            filename (str): name of the binary file, default is the
+                export filename of the settings
+
+        Raises:
+            ImpfixError: the binary file cannot be written
+        """
+        filename = filename or self.__settings_object.export_file_name
+        string_index: dict = {}
+        columns: dict = {name: array(typecode) for name, typecode in NAVDATA_COLUMNS}
+
+        def intern(text: str) -> int:
+            """Return the index of text in the string table."""
+            if text not in string_index:
+                string_index[text] = len(string_index)
+            return string_index[text]
+
+        for rp in ofmx_data.get_reporting_point():
+            rp_region, rp_airport, rp_id, rp_type, rp_name, coords, rp_id5, rp_region2 = rp
+            lat, long = coords
+            columns['lat'].append(_coord(lat))
+            columns['long'].append(_coord(long))
+            columns['region'].append(intern(rp_region))
+            columns['airport'].append(intern(rp_airport))
+            columns['rp_id'].append(intern(rp_id))
+            columns['rp_type'].append(intern(rp_type))
+            columns['rp_name'].append(intern(rp_name))
+            columns['rp_id5'].append(intern(rp_id5))
+            columns['region2'].append(intern(rp_region2))
+
+        # Build the string table: offsets and UTF-8 data
+        columns['string_offsets'].append(0)
+        for text in string_index:       # dict keeps insertion order
+            columns['string_data'].frombytes(text.encode('utf-8'))
+            columns['string_offsets'].append(len(columns['string_data']))
+
+        # Compute the column offsets
+        offsets: list = []
+        offset = _align(_HEADER_STRUCT.size)
+        for name, typecode in NAVDATA_COLUMNS:
+            offsets.append(offset)
+            offset = _align(offset + len(columns[name]) * columns[name].itemsize)
+
+        effective = str(ofmx_data.OFMX_meta_data.get('effective') or '')
+        header = _HEADER_STRUCT.pack(NAVDATA_MAGIC, NAVDATA_VERSION, 0,
+                                     len(columns['lat']), len(string_index),
+                                     effective.encode('ascii', 'replace')[:32],
+                                     *offsets)
+        # Write a new file and replace the old one by it: processes
+        # which have mapped the old file keep their (unchanged) pages,
+        # truncating the mapped file would crash them (SIGBUS).
+        temp_filename = filename + self.__cls_temp_name_ext
+        try:
+            with open(temp_filename, 'wb') as navdata_file:
+                navdata_file.write(header)
+                for (name, typecode), offset in zip(NAVDATA_COLUMNS, offsets):
+                    column = columns[name]
+                    if sys.byteorder == 'big':
+                        column.byteswap()
+                    navdata_file.write(b'\0' * (offset - navdata_file.tell()))
+                    column.tofile(navdata_file)
+            os.replace(temp_filename, filename)
+        except IOError as e:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            raise ImpfixError('I/O error({}): {}'.format(e.errno, e.strerror),
+                              'Error while creating the file \'{}\''.format(filename)) from e
+        print('Binary navdata successfully exported to \'{}\''.format(filename))
+
+
+class NavdataBinaryClass:
+    """Memory-mapped binary navdata file.
+
+    The columns are zero-copy NumPy views into the memory map, so
+    several processes opening the same file share the pages.
+
+    Usage:
+        with NavdataBinaryClass('lo.navdata') as navdata:
+            print(navdata.effective, navdata.lat[:10])
+            print(navdata.strings('rp_id5')[:10])
+    """
+
+    def __init__(self, filename: str) -> None:
+        """Open and memory-map the binary navdata file.
+
+        Raises:
+            ValueError: the file is not a binary navdata file, is
+                truncated or has an unsupported version
+        """
+        import numpy    # only needed for loading
+
+        ## File object of the binary navdata file
+        self._navdata_file = open(filename, 'rb')
+        ## Memory map of the binary navdata file
+        self._mmap: mmap.mmap = None
+        ## Columns as NumPy views into the memory map
+        self._columns: dict = {}
+        ## Decoded string table, built on first use
+        self._string_table: list = None
+        try:
+            self._map_file(filename, numpy)
+        except:
+            self.close()
+            raise
+
+    def _map_file(self, filename: str, numpy) -> None:
+        """Memory-map the file, check the header and create the views."""
+        file_size = os.fstat(self._navdata_file.fileno()).st_size
+        if file_size < _HEADER_STRUCT.size:
+            raise ValueError('{} is too short for a binary navdata file ({} bytes)'
+                             .format(filename, file_size))
+        self._mmap = mmap.mmap(self._navdata_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, rp_count, string_count, effective, *offsets = \
+            _HEADER_STRUCT.unpack_from(self._mmap)
+        if magic != NAVDATA_MAGIC:
+            raise ValueError('{} is not a binary navdata file'.format(filename))
+        if version != NAVDATA_VERSION:
+            raise ValueError('{} has binary navdata version {}, supported is version {}'
+                             .format(filename, version, NAVDATA_VERSION))
+        ## Number of reporting points
+        self.rp_count: int = rp_count
+        ## Effective date of the OFMX data
+        self.effective: str = effective.rstrip(b'\0').decode('ascii')
+        # numpy.frombuffer raises ValueError if a column exceeds the file
+        counts = {'string_offsets': string_count + 1}
+        for (name, typecode), offset in zip(NAVDATA_COLUMNS, offsets):
+            if name == 'string_data':
+                continue
+            self._columns[name] = numpy.frombuffer(
+                self._mmap, dtype='<f8' if typecode == 'd' else '<u4',
+                count=counts.get(name, rp_count), offset=offset)
+        string_offsets = self._columns['string_offsets']
+        self._columns['string_data'] = numpy.frombuffer(
+            self._mmap, dtype='u1', count=int(string_offsets[-1]),
+            offset=offsets[-1])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.rp_count
+
+    def close(self) -> None:
+        """Release the views and close the memory map and the file.
+
+        Views obtained before (e.g. lat = navdata.lat) stay valid: if
+        such views still exist, the memory map is not closed here but
+        unmapped when the last view is released.
+        """
+        self._columns = {}
+        self._string_table = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # views still refer to the memory map
+                pass
+            self._mmap = None
+        self._navdata_file.close()
+
+    @property
+    def lat(self):
+        """Latitudes of all reporting points (float64 view)."""
+        return self._columns['lat']
+
+    @property
+    def long(self):
+        """Longitudes of all reporting points (float64 view)."""
+        return self._columns['long']
+
+    def column(self, name: str):
+        """Return the view of a column, e.g. 'rp_id5' (string indices)."""
+        return self._columns[name]
+
+    def string(self, index: int) -> str:
+        """Return the string with the given index of the string table."""
+        string_offsets = self._columns['string_offsets']
+        start, end = int(string_offsets[index]), int(string_offsets[index + 1])
+        return self._columns['string_data'][start:end].tobytes().decode('utf-8')
+
+    def strings(self, name: str) -> list:
+        """Return the decoded strings of a string column, e.g. 'rp_id5'."""
+        if name not in NAVDATA_STRING_COLUMNS:
+            raise KeyError(name)
+        if self._string_table is None:
+            self._string_table = [self.string(i) for i in
+                                  range(len(self._columns['string_offsets']) - 1)]
+        return [self._string_table[i] for i in self._columns[name].tolist()]
+
+    def get_reporting_point(self) -> list:
+        """Generator function to return the reporting points
+
+        Same layout as OFMXFileClass.get_reporting_point(), but with
+        float coordinates.
+
+        Yields:
+            rp: single reporting point as list with data elements
+        """
+        region, airport, rp_id, rp_type, rp_name, rp_id5, region2 = \
+            (self.strings(name) for name in NAVDATA_STRING_COLUMNS)
+        for i, (lat, long) in enumerate(zip(self.lat.tolist(), self.long.tolist())):
+            yield [region[i], airport[i], rp_id[i], rp_type[i], rp_name[i],
+                   [lat, long], rp_id5[i], region2[i]]
@@ -0,0 +1,271 @@
+"""
+Read the Open Flight Maps data with a memory budget (--max-memory).
+
+For worldwide data the reporting point list, the airport dictionary
+and the sort buffer do not fit into the memory of small machines. The
+memory budget limits the reporting point data held in memory, as
+estimated with sys.getsizeof(). It is a data budget, not a limit of
+the resident size of the process: the Python interpreter, the XML
+parser (one block of the file and one knot) and the user_fix.dat
+writer need memory in addition.
+
+1. Stream the OFMX file knot by knot. The reporting points are
+   distributed to buckets by airport, so all reporting points of an
+   airport end up in the same bucket, in the order of the OFMX file.
+   Whenever the buffered reporting points reach the memory budget,
+   they are appended to one temporary file per bucket.
+2. Group the buckets into chunks whose reporting points need at most
+   half of the memory budget; the other half is left for the
+   reporting point ids and the sort keys. Load one chunk at a time,
+   build the five character reporting point ids, sort the chunk and
+   write it back to a temporary file in batches.
+3. Merge the sorted chunks while the user_fix.dat file is written.
+   Only one batch per chunk is in memory, all batches together need at
+   most half of the memory budget.
+
+If all reporting points fit into half of the memory budget, nothing is
+written to temporary files and the reporting points are processed in
+memory.
+
+The reporting point ids only depend on the reporting points of the
+same airport and the sort is stable, so the result is the same as
+without memory budget.
+"""
+
+import heapq
+import os
+import pickle
+import sys
+import tempfile
+import zlib
+
+import settings
+from ofmx_data import OFMXFileClass
+
+def _resident_size() -> int:
+    """Return the resident size of the Impfix process in bytes.
+
+    Uses /proc on Linux. Elsewhere only the peak resident size is
+    available; 0 if the resident size cannot be determined at all.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:     # Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _rp_size(rp_data: list) -> int:
+    """Return the estimated memory size of a reporting point in bytes."""
+    return (sys.getsizeof(rp_data) + sum(sys.getsizeof(e) for e in rp_data)
+            + sum(sys.getsizeof(e) for e in rp_data[5]))
+
+
+class OFMXChunkedFileClass(OFMXFileClass):
+    """OFMX file processed in airport-grouped chunks with a memory budget.
+
+    Provides the same interface as OFMXFileClass.
+    """
+    ## Number of buckets the airports are distributed to (= maximum
+    ## number of temporary files)
+    __cls_bucket_count: int = 256
+    ## Maximum number of reporting points per batch in the sorted chunk
+    ## files
+    __cls_batch_size: int = 1000
+
+    def __init__(self, impfix_settings: settings.SettingsClass) -> None:
+        ## Settings
+        self.__settings_object: settings.SettingsClass = impfix_settings
+        ## Memory budget for the reporting point data in bytes
+        self._max_memory: int = int(impfix_settings.max_memory * 1024 * 1024)
+        ## Directory for the temporary files, created on the first spill
+        self._temp_dir: tempfile.TemporaryDirectory = None
+        ## Reporting points not yet spilled, one list per bucket
+        self._bucket_buffers: list = [[] for _ in range(self.__cls_bucket_count)]
+        ## Estimated size of all reporting points of each bucket
+        self._bucket_sizes: list = [0] * self.__cls_bucket_count
+        ## Estimated size of the reporting points not yet spilled
+        self._buffered_size: int = 0
+        ## Chunks: one list of buckets per chunk (empty if the
+        ## reporting points are processed in memory)
+        self._chunks: list = []
+        ## Number of reporting points per batch in the sorted chunk files
+        self._batch_size: int = self.__cls_batch_size
+        ## Number of reporting points read
+        self.rp_count: int = 0
+        ## Number of times the buffered reporting points were spilled
+        self.spill_count: int = 0
+        ## Peak resident size seen (for the verbose output only, the
+        ## resident size does not shrink when reporting points are
+        ## spilled)
+        self.peak_resident_size: int = 0
+        # the OFMX file is not parsed here, but streamed by read_and_parse()
+        super().__init__(impfix_settings)
+
+    def _parse_file(self, knot_handler=None):
+        if knot_handler is None:
+            return None
+        return super()._parse_file(knot_handler)
+
+    @property
+    def OFMX_meta_data(self) -> dict:
+        self._OFMX_meta_data = dict(self._root_attrib)
+        self._OFMX_meta_data['Root-Tag'] = self._root_tag
+        return self._OFMX_meta_data
+
+    def _temp_file_name(self, kind: str, number: int) -> str:
+        return os.path.join(self._temp_dir.name, '{}-{:03d}.pickle'.format(kind, number))
+
+    def read_and_parse(self) -> None:
+        """Read and parse the OFMX file chunk by chunk.
+
+        * Stream the OFMX file and spill the reporting points into
+          airport-grouped bucket files.
+        * Group the buckets into chunks, build the reporting point ids
+          and sort each chunk.
+
+        Raises:
+            ImpfixError: the OFMX file cannot be read or is not valid
+        """
+        print('Reading ''Dpn'' knots of OFM file (max. {} MB reporting point data)'
+              .format(self.__settings_object.max_memory))
+        self._parse_file(self._add_dpn_knot)
+        if self._temp_dir is None and self._buffered_size <= self._max_memory // 2:
+            # all reporting points fit into the memory budget
+            for buffer in self._bucket_buffers:
+                for rp_data in buffer:
+                    self._add_rp_name5(rp_data)
+                    self._reporting_point_list.append(rp_data)
+            self._bucket_buffers = []
+            self._reporting_point_list.sort(key=lambda rp_data: self.rp_sortkey(rp_data))
+        else:
+            self._spill_buckets()
+            self._bucket_buffers = []
+            self._group_buckets()
+            for chunk, buckets in enumerate(self._chunks):
+                self._sort_chunk(chunk, buckets)
+        self.peak_resident_size = max(self.peak_resident_size, _resident_size())
+        if self.__settings_object.verbose:
+            print('{} reporting points, {} spills, {} chunks, peak resident size {:.1f} MB'
+                  .format(self.rp_count, self.spill_count, len(self._chunks),
+                          self.peak_resident_size / 1024 / 1024))
+
+    def _add_dpn_knot(self, knot) -> None:
+        """Knot handler: buffer the reporting point of a Dpn knot."""
+        if knot.tag != 'Dpn':
+            return
+        rp_data = self._extract_reporting_point(knot)
+        if rp_data is None:
+            return
+        # all reporting points of an airport go into the same bucket
+        bucket = zlib.crc32(rp_data[1].encode('utf-8')) % self.__cls_bucket_count
+        rp_size = _rp_size(rp_data)
+        self._bucket_buffers[bucket].append(rp_data)
+        self._bucket_sizes[bucket] += rp_size
+        self._buffered_size += rp_size
+        self.rp_count += 1
+        if self._buffered_size >= self._max_memory:
+            self._spill_buckets()
+
+    def _spill_buckets(self) -> None:
+        """Append the buffered reporting points to the bucket files."""
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.TemporaryDirectory(prefix='impfix-')
+        self.peak_resident_size = max(self.peak_resident_size, _resident_size())
+        for bucket, buffer in enumerate(self._bucket_buffers):
+            if buffer:
+                with open(self._temp_file_name('bucket', bucket), 'ab') as bucket_file:
+                    pickle.dump(buffer, bucket_file, pickle.HIGHEST_PROTOCOL)
+                buffer.clear()
+        self._buffered_size = 0
+        self.spill_count += 1
+
+    def _group_buckets(self) -> None:
+        """Group the buckets into chunks which fit into half of the
+        memory budget, and choose the batch size for the merge."""
+        chunk_limit = max(1, self._max_memory // 2)
+        largest_size = max(self._bucket_sizes)
+        if largest_size > chunk_limit:
+            # the reporting points of an airport cannot be split
+            print('**Warning: the reporting points of the same airports need up to '
+                  '{:.1f} MB, more than half of the memory budget'
+                  .format(largest_size / 1024 / 1024))
+        chunk: list = []
+        chunk_size: int = 0
+        for bucket, size in enumerate(self._bucket_sizes):
+            if size == 0:
+                continue
+            if chunk and chunk_size + size > chunk_limit:
+                self._chunks.append(chunk)
+                chunk, chunk_size = [], 0
+            chunk.append(bucket)
+            chunk_size += size
+        if chunk:
+            self._chunks.append(chunk)
+        # one batch per chunk is in memory while merging
+        mean_rp_size = sum(self._bucket_sizes) / max(1, self.rp_count)
+        self._batch_size = max(1, min(self.__cls_batch_size,
+                                      int(chunk_limit / max(1, len(self._chunks)) / mean_rp_size)))
+
+    @staticmethod
+    def _read_temp_file(file_name: str):
+        """Generator function to return the lists stored in a temporary file."""
+        with open(file_name, 'rb') as temp_file:
+            while True:
+                try:
+                    yield pickle.load(temp_file)
+                except EOFError:
+                    return
+
+    def _sort_chunk(self, chunk: int, buckets: list) -> None:
+        """Build the reporting point ids of a chunk and sort it."""
+        # the airports of this chunk are not in any other chunk
+        self._airport_dict = {}
+        rp_list: list = []
+        for bucket in buckets:
+            bucket_file_name = self._temp_file_name('bucket', bucket)
+            for buffer in self._read_temp_file(bucket_file_name):
+                for rp_data in buffer:
+                    self._add_rp_name5(rp_data)
+                    rp_list.append(rp_data)
+            os.remove(bucket_file_name)
+        rp_list.sort(key=lambda rp_data: self.rp_sortkey(rp_data))
+        with open(self._temp_file_name('sorted', chunk), 'wb') as chunk_file:
+            for i in range(0, len(rp_list), self._batch_size):
+                pickle.dump(rp_list[i:i + self._batch_size], chunk_file,
+                            pickle.HIGHEST_PROTOCOL)
+        self.peak_resident_size = max(self.peak_resident_size, _resident_size())
+        self._airport_dict = {}
+
+    def _read_sorted_chunk(self, chunk: int):
+        """Generator function to return the reporting points of a sorted chunk."""
+        for rp_list in self._read_temp_file(self._temp_file_name('sorted', chunk)):
+            yield from rp_list
+
+    def get_reporting_point(self) -> list:
+        """Generator function to return the ofmx data lines
+
+        Merges the sorted chunks.
+
+        Yields:
+            rp: single reporting point as list with data elements
+        """
+        if not self._chunks:
+            yield from super().get_reporting_point()
+            return
+        yield from heapq.merge(*(self._read_sorted_chunk(chunk)
+                                 for chunk in range(len(self._chunks))),
+                               key=self.rp_sortkey)
+
+    def close(self) -> None:
+        """Delete the temporary files."""
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
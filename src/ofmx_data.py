@@ -39,32 +39,77 @@ Format of Open Flight Maps File :
 #   </Dpn>
 """
 
-import sys
+import functools
+import re
 import xml.etree.ElementTree as ET
 
 import settings
+from impfix_errors import ImpfixError
+from ofmx_validator import OFMXValidatorClass
+
+def _read_blocks(ofmx_file, block_size: int):
+    """Generator function to read a file in blocks which end with '>'.
+
+    No start tag is split between two blocks, so the start tag of each
+    element is in the block which is parsed when its start event is
+    reported.
+
+    Yields:
+        tuple: (line number of the first line, block)
+    """
+    line = 1
+    rest = b''
+    while data := ofmx_file.read(block_size):
+        data = rest + data
+        cut = data.rfind(b'>') + 1
+        block, rest = data[:cut], data[cut:]
+        if block:
+            yield line, block
+            line += block.count(b'\n')
+    if rest:
+        yield line, rest
+
+
+def _find_line(block: bytes, block_line: int, tag: str, index: int) -> int:
+    """Return the line number of the index-th start tag of tag in block.
+
+    Args:
+        block (bytes): block of the OFMX file
+        block_line (int): line number of the first line of the block
+        tag (str): tag of the element
+        index (int): number of start tags of tag before it in the block
+    """
+    pattern = re.compile(b'<' + re.escape(tag.encode('utf-8')) + rb'[\s/>]')
+    for i, match in enumerate(pattern.finditer(block)):
+        if i == index:
+            return block_line + block.count(b'\n', 0, match.start())
+    return block_line
 
-ReportingPointList: list = []
 
 class OFMXFileClass:
+    ## Minimum size of the blocks fed to the XML parser
+    __cls_block_size: int = 64 * 1024
+
     def __init__(self, impfix_settings: settings.SettingsClass) -> None:
         ## Settings
         self.__settings_object: settings.SettingsClass = impfix_settings
-        try:
-            ## XML/OFMX tree of the OFMX file
-            self._xml_tree = ET.parse(self.__settings_object.OFM_file_name)
-        except IOError as e:
-            errno, strerror = e.args
-            print('**I/O error({0}): {1}'.format(errno,strerror))
-            print('**File not found: {0}'.format(self.__settings_object.OFM_file_name))
-            exit()
-        except:
-            print('**Unknown error: ', sys.exc_info()[0:2])
-            exit()
-        ## Root element of the XML/OFMX tree
-        self._tree_root = self._xml_tree.getroot()
+        ## Structural validator, runs while the OFMX file is parsed
+        self._validator: OFMXValidatorClass = None
+        if self.__settings_object.validate:
+            self._validator = OFMXValidatorClass(self.__settings_object.OFM_file_name,
+                                                 self.__settings_object.max_errors)
         ## Airport dictionary with all reporting points per airport
         self._airport_dict = {}
+        ## List of all reporting points
+        self._reporting_point_list: list = []
+        ## Tag and attributes of the root element (if the file is
+        ## parsed knot by knot)
+        self._root_tag: str = ''
+        self._root_attrib: dict = {}
+        ## XML/OFMX tree of the OFMX file
+        self._xml_tree: ET.ElementTree = self._parse_file()
+        ## Root element of the XML/OFMX tree
+        self._tree_root = (self._xml_tree.getroot() if self._xml_tree is not None else None)
 
     @property
     def OFMX_meta_data(self) -> dict:
@@ -74,6 +119,108 @@ class OFMXFileClass:
         self._OFMX_meta_data['Root-Tag'] = self._tree_root.tag  # --> "OFMX-Snapshot"
         return self._OFMX_meta_data
 
+    def _parse_file(self, knot_handler=None) -> ET.ElementTree:
+        """Parse the OFMX file (and validate it if requested).
+
+        Args:
+            knot_handler: if given, the file is parsed knot by knot
+                (see _parse_blocks()) and None is returned
+
+        Returns:
+            ET.ElementTree: XML/OFMX tree of the OFMX file
+
+        Raises:
+            ImpfixError: the OFMX file cannot be read, is no XML file
+                or is not valid
+        """
+        file_name = self.__settings_object.OFM_file_name
+        try:
+            if (self._validator is not None) or (knot_handler is not None):
+                xml_tree = self._parse_blocks(file_name, knot_handler)
+            else:
+                xml_tree = ET.parse(file_name)
+        except IOError as e:
+            raise ImpfixError('I/O error({0}): {1}'.format(e.errno, e.strerror),
+                              'File not found: {0}'.format(file_name)) from e
+        except ET.ParseError as e:
+            raise ImpfixError('XML error: {0}'.format(e),
+                              'File not readable: {0}'.format(file_name)) from e
+        if (self._validator is not None) and (not self._validator.is_valid):
+            raise ImpfixError(*self._validator.error_messages(),
+                              'File not valid: {0}'.format(file_name))
+        return xml_tree
+
+    def _parse_blocks(self, file_name: str, knot_handler=None) -> ET.ElementTree:
+        """Parse the OFMX file block by block and validate it in the
+        same pass.
+
+        The blocks are fed to ElementTree's pull parser, so the tree is
+        built by C code and only the knots (children of the root
+        element) are handled in Python: the validator (if any) checks
+        each complete Dpn and Ase knot.
+
+        Without knot_handler the complete tree is built. With
+        knot_handler each valid knot is passed to knot_handler(knot),
+        and every knot is removed from the tree afterwards, so the
+        memory needed does not grow with the size of the file. The root
+        element is then only stored as _root_tag and _root_attrib.
+        """
+        # Only start events are reported (half the Python work of start
+        # and end events). The events of a block are read after the
+        # block is parsed, so a knot is complete when the start event
+        # of the next knot is read.
+        parser = ET.XMLPullParser(events=('start',))
+        validator = self._validator
+        root: ET.Element = None
+        # position of the next knot in the root element
+        next_knot: int = 0
+        knot: ET.Element = None
+        knot_line = None
+
+        def handle_knot() -> None:
+            nonlocal next_knot
+            is_valid = True
+            if validator is not None and knot.tag in validator.checked_knots:
+                is_valid = validator.check_knot(knot, knot_line)
+            if knot_handler is not None:
+                # invalid knots are not handled, the validator reports
+                # them when the file is parsed
+                if is_valid:
+                    knot_handler(knot)
+                root.remove(knot)
+                next_knot -= 1
+
+        def handle_events(block: bytes, block_line: int) -> None:
+            nonlocal root, next_knot, knot, knot_line
+            # number of knots per tag started in this block
+            knot_index: dict = {}
+            for _, element in parser.read_events():
+                if root is None:
+                    root = element
+                    self._root_tag, self._root_attrib = element.tag, dict(element.attrib)
+                    continue
+                if next_knot >= len(root) or root[next_knot] is not element:
+                    continue        # not a knot
+                next_knot += 1
+                if knot is not None:
+                    handle_knot()
+                knot = element
+                index = knot_index.get(element.tag, 0)
+                knot_index[element.tag] = index + 1
+                knot_line = functools.partial(_find_line, block, block_line,
+                                              element.tag, index)
+
+        with open(file_name, 'rb') as ofmx_file:
+            for block_line, block in _read_blocks(ofmx_file, self.__cls_block_size):
+                parser.feed(block)
+                handle_events(block, block_line)
+        parser.close()
+        if knot is not None:
+            handle_knot()
+        if knot_handler is not None:
+            return None
+        return ET.ElementTree(root)
+
     def read_and_parse(self) -> None:
         """Read and parse the OFMX file.
 
@@ -83,58 +230,75 @@ class OFMXFileClass:
         # iterate over all Dpn knots
         print('Reading ''Dpn'' knots of OFM file')
         for dpn in self._tree_root.findall('Dpn'):     # --> list of elements
-            rp_data: list = []
-            # Find the reporting point type within the Dpn knot and 
-            # filter by type if necessary
-            # Available types: ['VFR-RP', 'VFR-MRP', 'VFR-HELI', 'VFR-GLDR', 'ICAO']
-            # @todo implement filter
-            if (dpn.find('codeType') is not None) and \
-               (dpn.find('codeType').text.strip() in ['VFR-RP', 'VFR-MRP', 'VFR-HELI']):
-                # store reporting point type
-                rp_data.append(dpn.find('codeType').text.strip())
-                # store ICAO airport code
-                if dpn.find('AhpUidAssoc/codeId') is not None:
-                    rp_data.insert(0, dpn.find('AhpUidAssoc/codeId').text.strip())
-                else:
-                    rp_data.insert(0, 'n/a ')
-                # store reporting point name
-                if dpn.find('txtName') is not None:
-                    rp_data.append(dpn.find('txtName').text.strip())
-                else:
-                    rp_data.append('n/a')
-                # Find the DpnUid element within the Dpn knot and read the data
-                dpn_uid = dpn.find('DpnUid')
-                if dpn_uid is not None:
-                    # store reporting point id
-                    rp_data.insert(1, dpn_uid.find('codeId').text.strip())
-                    # store coordinates (RP-longitude and RP-latitude)
-                    rp_data.append(self.convert_to_xplane_coord([dpn_uid.find('geoLat').text, 
-                                                                 dpn_uid.find('geoLong').text]))
-                    # reporting point region
-                    rp_data.insert(0, dpn_uid.attrib.get('region'))
-                else:
-                    rp_data.insert(1, '')     # RP-Id
-                    rp_data.append(['', ''])  # RP coordinates
-                    rp_data.insert(0, '')     # RP region
+            rp_data = self._extract_reporting_point(dpn)
+            if rp_data is not None:
+                self._add_rp_name5(rp_data)
+                # Add reporting point data to reporting point list
+                self._reporting_point_list.append(rp_data)
 
-                # Create a reporting point id which is only five
-                # characters long and unique within one airport
-                rp_data.append(self.build_rp_name5(rp_data))
+        # Sort reporting point list by region, icao-id and reporting 
+        # point id
+        self._reporting_point_list.sort(key=lambda rp_data: self.rp_sortkey(rp_data))
 
-                # Add shortened region
-                rp_data.append(rp_data[0][0:2])
+    def _extract_reporting_point(self, dpn: ET.Element) -> list:
+        """Extract the reporting point data of a Dpn knot.
 
-                # Add reporting point data to reporting point list
-                ReportingPointList.append(rp_data)
+        Returns:
+            list: [region, airport, rp id, rp type, rp name, coords]
+                  or None if the Dpn knot is not a reporting point
+        """
+        rp_data: list = []
+        # Find the reporting point type within the Dpn knot and 
+        # filter by type if necessary
+        # Available types: ['VFR-RP', 'VFR-MRP', 'VFR-HELI', 'VFR-GLDR', 'ICAO']
+        # @todo implement filter
+        if (dpn.find('codeType') is None) or \
+           (dpn.find('codeType').text.strip() not in ['VFR-RP', 'VFR-MRP', 'VFR-HELI']):
+            return None
+        # store reporting point type
+        rp_data.append(dpn.find('codeType').text.strip())
+        # store ICAO airport code
+        if dpn.find('AhpUidAssoc/codeId') is not None:
+            rp_data.insert(0, dpn.find('AhpUidAssoc/codeId').text.strip())
+        else:
+            rp_data.insert(0, 'n/a ')
+        # store reporting point name
+        if dpn.find('txtName') is not None:
+            rp_data.append(dpn.find('txtName').text.strip())
+        else:
+            rp_data.append('n/a')
+        # Find the DpnUid element within the Dpn knot and read the data
+        dpn_uid = dpn.find('DpnUid')
+        if dpn_uid is not None:
+            # store reporting point id
+            rp_data.insert(1, dpn_uid.find('codeId').text.strip())
+            # store coordinates (RP-longitude and RP-latitude)
+            rp_data.append(self.convert_to_xplane_coord([dpn_uid.find('geoLat').text, 
+                                                         dpn_uid.find('geoLong').text]))
+            # reporting point region
+            rp_data.insert(0, dpn_uid.attrib.get('region'))
+        else:
+            rp_data.insert(1, '')     # RP-Id
+            rp_data.append(['', ''])  # RP coordinates
+            rp_data.insert(0, '')     # RP region
+        return rp_data
 
-                #print(self._airport_dict)
+    def _add_rp_name5(self, rp_data: list) -> None:
+        """Add the five character reporting point id and the shortened
+        region to the reporting point data.
 
-                if self.__settings_object.verbose:
-                    print(rp_data)
+        The reporting points of an airport have to be passed in the
+        order of the OFMX file, so the ids are always the same.
+        """
+        # Create a reporting point id which is only five
+        # characters long and unique within one airport
+        rp_data.append(self.build_rp_name5(rp_data))
 
-        # Sort reporting point list by region, icao-id and reporting 
-        # point id
-        ReportingPointList.sort(key=lambda rp_data: self.rp_sortkey(rp_data))
+        # Add shortened region
+        rp_data.append(rp_data[0][0:2])
+
+        if self.__settings_object.verbose:
+            print(rp_data)
 
     def rp_sortkey(self, rp_data: list) -> str:
         """
@@ -176,9 +340,22 @@ class OFMXFileClass:
         Yields:
             rp: single reporting point as list with data elements
         """
-        for rp in ReportingPointList:
+        for rp in self._reporting_point_list:
             yield rp
 
+    def close(self) -> None:
+        """Release the resources of the OFMX data.
+
+        Nothing to do here, the data is in memory only; subclasses
+        with temporary files or processes release them.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def build_rp_name5(self, rp_data: list) -> str:
         """
         rename reporting point ids to max len of 5 characters
@@ -0,0 +1,96 @@
+"""
+Pipelined execution: parse the OFMX file while the old user_fix.dat
+file is copied.
+
+* Parse the OFMX file in a separate process (producer)
+* The user_fix.dat writer (consumer) copies the old user_fix.dat file
+  up to the start mark in the meantime
+* As soon as the start mark is reached, the writer waits for the
+  sorted reporting point list and writes it
+
+Parsing and copying are both Python code holding the GIL, so a thread
+would not overlap them; a separate process does. The reporting point
+list is complete and sorted only at the end of the parse (the sort
+order and the unique reporting point ids depend on all reporting
+points), so it is handed over as a whole.
+"""
+
+import concurrent.futures
+
+import settings
+from ofmx_data import OFMXFileClass
+
+def _read_snapshot(impfix_settings: settings.SettingsClass) -> tuple:
+    """Producer process: read and parse the OFMX file.
+
+    Returns:
+        tuple: (OFMX meta data, sorted reporting point list)
+    """
+    ofmx_data = OFMXFileClass(impfix_settings)
+    ofmx_data.read_and_parse()
+    return dict(ofmx_data.OFMX_meta_data), list(ofmx_data.get_reporting_point())
+
+
+class OFMXPipelineClass:
+    """Producer side of the pipelined execution mode.
+
+    Provides the same interface as OFMXFileClass which is used by
+    XPlaneNavDataClass (OFMX_meta_data and get_reporting_point()), so
+    the writer does not need to know whether the data comes from the
+    pipeline or not.
+    """
+
+    def __init__(self, impfix_settings: settings.SettingsClass) -> None:
+        ## Settings
+        self.__settings_object: settings.SettingsClass = impfix_settings
+        ## Producer process
+        self._executor: concurrent.futures.ProcessPoolExecutor = None
+        ## Result of the producer process
+        self._future: concurrent.futures.Future = None
+        ## OFMX meta data, available when the OFMX file is parsed
+        self._OFMX_meta_data: dict = None
+        ## Sorted reporting point list, available when the OFMX file is parsed
+        self._reporting_point_list: list = None
+
+    def start(self) -> None:
+        """Start parsing the OFMX file in the producer process."""
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+        self._future = self._executor.submit(_read_snapshot, self.__settings_object)
+
+    def _wait_for_producer(self) -> None:
+        """Wait until the OFMX file is parsed.
+
+        Errors of the producer process are raised again here.
+        """
+        if self._reporting_point_list is None:
+            try:
+                self._OFMX_meta_data, self._reporting_point_list = self._future.result()
+            finally:
+                self.close()
+
+    def close(self) -> None:
+        """Stop the producer process."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def OFMX_meta_data(self) -> dict:
+        self._wait_for_producer()
+        return self._OFMX_meta_data
+
+    def get_reporting_point(self) -> list:
+        """Generator function to return the ofmx data lines
+
+        Yields:
+            rp: single reporting point as list with data elements
+        """
+        self._wait_for_producer()
+        for rp in self._reporting_point_list:
+            yield rp
@@ -0,0 +1,253 @@
+"""Read the airspace shapes of the Open Flight Maps shape extension.
+
+Format of the shape extension file
+``ofmx_<rr>/isolated/ofmx_<rr>_ofmShapeExtension.xml``:
+
+#   <Ase mid="519b1513-b902-f7c3-76b2-7c5cecd05d86">
+#     <AseUid mid="519b1513-b902-f7c3-76b2-7c5cecd05d86">
+#       <codeType>FIR</codeType>
+#       <codeId>LOVV</codeId>
+#     </AseUid>
+#     <gmlPosList>16.11361111,46.86888889,0 16.11194444,46.86916667,1 ...</gmlPosList>
+#   </Ase>
+
+A single gmlPosList (e.g. the LOVV FIR) can be some hundred kilobytes
+of text. The file is therefore read with a streaming parser: the
+character data of gmlPosList is split into coordinates as it arrives
+and stored in float arrays, so neither the raw text of a gmlPosList
+nor a DOM of the file is kept in memory.
+"""
+
+import xml.parsers.expat
+from array import array
+
+import settings
+from impfix_errors import ImpfixError
+from ofmx_validator import OFMXValidatorClass
+
+class AirspaceShapeClass:
+    """Lateral bounds of one airspace (Ase knot)."""
+
+    def __init__(self, mid: str) -> None:
+        ## mid attribute of the Ase knot
+        self.mid: str = mid
+        ## Airspace type, e.g. 'FIR', 'CTR', 'TMA'
+        self.code_type: str = ''
+        ## Airspace id, e.g. 'LOVV'
+        self.code_id: str = ''
+        ## Longitudes of the polygon vertices
+        self.long: array = array('d')
+        ## Latitudes of the polygon vertices
+        self.lat: array = array('d')
+
+    def __len__(self) -> int:
+        return len(self.long)
+
+    def __repr__(self) -> str:
+        return '<AirspaceShapeClass {} {} ({} vertices)>'.format(
+            self.code_type, self.code_id, len(self))
+
+
+def simplify_douglas_peucker(long: array, lat: array, tolerance: float) -> tuple:
+    """Simplify a polyline with the Douglas-Peucker algorithm.
+
+    Args:
+        long (array): longitudes of the vertices
+        lat (array): latitudes of the vertices
+        tolerance (float): maximum distance (in degrees) of a removed
+            vertex from the simplified polyline
+
+    Returns:
+        tuple: (long, lat) arrays of the remaining vertices
+    """
+    count = len(long)
+    if count < 3 or tolerance <= 0:
+        return long, lat
+    keep = bytearray(count)
+    keep[0] = keep[count - 1] = 1
+    # iterative instead of recursive: polygons can have many
+    # thousand vertices
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = long[first], lat[first]
+        dx, dy = long[last] - x1, lat[last] - y1
+        length = (dx * dx + dy * dy) ** 0.5
+        max_dist, max_index = -1.0, first
+        for i in range(first + 1, last):
+            if length > 0:
+                # distance of the vertex to the line first - last
+                dist = abs(dy * (long[i] - x1) - dx * (lat[i] - y1)) / length
+            else:
+                # closed polygon: first and last vertex are equal
+                dist = ((long[i] - x1) ** 2 + (lat[i] - y1) ** 2) ** 0.5
+            if dist > max_dist:
+                max_dist, max_index = dist, i
+        if max_dist > tolerance:
+            keep[max_index] = 1
+            stack.append((first, max_index))
+            stack.append((max_index, last))
+    return (array('d', (x for x, k in zip(long, keep) if k)),
+            array('d', (y for y, k in zip(lat, keep) if k)))
+
+
+class OFMXShapeClass:
+    """Streaming reader for the airspace shapes of the shape extension."""
+    ## Size of the chunks read from the shape extension file
+    __cls_chunk_size: int = 64 * 1024
+
+    def __init__(self, impfix_settings: settings.SettingsClass,
+                 shape_file_name: str, tolerance: float = 0.0,
+                 validator: OFMXValidatorClass = None) -> None:
+        """
+        Args:
+            impfix_settings (SettingsClass): settings
+            shape_file_name (str): name of the shape extension file
+            tolerance (float): Douglas-Peucker tolerance in degrees
+                for the simplification of the shapes; 0 = no
+                simplification
+            validator (OFMXValidatorClass): optional validator which
+                checks the file while it is read; all errors are then
+                reported when the file is parsed
+        """
+        ## Settings
+        self.__settings_object: settings.SettingsClass = impfix_settings
+        ## Filename of the shape extension file
+        self.shape_file_name: str = shape_file_name
+        ## Douglas-Peucker tolerance in degrees (0 = no simplification)
+        self.tolerance: float = tolerance
+        ## Optional structural validator
+        self.validator: OFMXValidatorClass = validator
+        ## Attributes of the root element
+        self.OFMX_meta_data: dict = {}
+        ## List of airspace shapes
+        self.shapes: list = []
+        # Parser state
+        self._element_path: list = []
+        self._shape: AirspaceShapeClass = None
+        self._text: list = []
+        self._pos_rest: str = ''
+        self._parser = None
+
+    def read_and_parse(self) -> None:
+        """Read and parse the shape extension file.
+
+        Raises:
+            ImpfixError: the shape extension file cannot be read, is no
+                XML file or is not valid; without validator the first
+                gmlPosList which does not consist of 'long,lat,value'
+                triples is reported
+        """
+        print('Reading ''Ase'' knots of OFM shape extension file')
+        self._parser = xml.parsers.expat.ParserCreate()
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+        self._parser.CharacterDataHandler = self._character_data
+        try:
+            with open(self.shape_file_name, 'rb') as shape_file:
+                while chunk := shape_file.read(self.__cls_chunk_size):
+                    self._parser.Parse(chunk, False)
+                self._parser.Parse(b'', True)
+        except IOError as e:
+            raise ImpfixError('I/O error({0}): {1}'.format(e.errno, e.strerror),
+                              'File not found: {0}'.format(self.shape_file_name)) from e
+        except xml.parsers.expat.ExpatError as e:
+            raise ImpfixError('XML error: {0}'.format(e),
+                              'File not readable: {0}'.format(self.shape_file_name)) from e
+        finally:
+            self._parser = None
+        if (self.validator is not None) and (not self.validator.is_valid):
+            raise ImpfixError(*self.validator.error_messages(),
+                              'File not valid: {0}'.format(self.shape_file_name))
+
+    def _start_element(self, tag: str, attrib: dict) -> None:
+        if self.validator is not None:
+            self.validator.start(tag, self._parser.CurrentLineNumber)
+        self._element_path.append(tag)
+        if len(self._element_path) == 1:
+            self.OFMX_meta_data = dict(attrib)
+            self.OFMX_meta_data['Root-Tag'] = tag
+        elif self._element_path[1:] == ['Ase']:
+            self._shape = AirspaceShapeClass(attrib.get('mid', ''))
+        self._text = []
+
+    def _character_data(self, data: str) -> None:
+        if self.validator is not None:
+            self.validator.data(data, self._parser.CurrentLineNumber)
+        if self._shape is None:
+            return
+        if self._element_path[-2:] == ['Ase', 'gmlPosList']:
+            self._add_positions(data)
+        elif self._element_path[-2:] in (['AseUid', 'codeType'], ['AseUid', 'codeId']):
+            self._text.append(data)
+
+    def _end_element(self, tag: str) -> None:
+        if self.validator is not None:
+            self.validator.end(tag, self._parser.CurrentLineNumber)
+        if self._shape is not None:
+            if tag == 'gmlPosList':
+                self._add_positions(' ')    # flush the last coordinate
+            elif tag == 'codeType' and self._element_path[-2] == 'AseUid':
+                self._shape.code_type = ''.join(self._text).strip()
+            elif tag == 'codeId' and self._element_path[-2] == 'AseUid':
+                self._shape.code_id = ''.join(self._text).strip()
+            elif tag == 'Ase' and len(self._element_path) == 2:
+                shape = self._shape
+                shape.long, shape.lat = simplify_douglas_peucker(
+                    shape.long, shape.lat, self.tolerance)
+                self.shapes.append(shape)
+                if self.__settings_object is not None and self.__settings_object.verbose:
+                    print(shape)
+                self._shape = None
+        self._text = []
+        self._element_path.pop()
+
+    def _add_positions(self, data: str) -> None:
+        """Split gmlPosList character data into coordinates.
+
+        The character data arrives in pieces, so a coordinate triple
+        can be split between two pieces. The incomplete last triple is
+        kept until the next piece arrives.
+        """
+        data = self._pos_rest + data
+        triples = data.split()
+        if triples and not data[-1].isspace():
+            self._pos_rest = triples.pop()
+        else:
+            self._pos_rest = ''
+        if not triples:
+            return
+        values = ','.join(triples).split(',')
+        try:
+            if len(values) != 3 * len(triples):
+                raise ValueError
+            long, lat = array('d', map(float, values[0::3])), array('d', map(float, values[1::3]))
+        except ValueError:
+            if self.validator is None:
+                raise ImpfixError('{}:{}: gmlPosList of {} {} is not a list of '
+                                  '\'long,lat,value\' triples'.format(
+                                      self.shape_file_name,
+                                      self._parser.CurrentLineNumber,
+                                      self._shape.code_type, self._shape.code_id),
+                                  'File not valid: {0}'.format(self.shape_file_name))
+            # the validator reports the malformed triples after the
+            # parse: skip them to find the further errors
+            long, lat = array('d'), array('d')
+            for triple in triples:
+                try:
+                    x, y, _ = map(float, triple.split(','))
+                except ValueError:
+                    continue
+                long.append(x)
+                lat.append(y)
+        self._shape.long.extend(long)
+        self._shape.lat.extend(lat)
+
+    def get_shape(self) -> AirspaceShapeClass:
+        """Generator function to return the airspace shapes
+
+        Yields:
+            shape: single airspace shape
+        """
+        for shape in self.shapes:
+            yield shape
@@ -0,0 +1,205 @@
+"""
+Check the structure of an OFMX file while it is parsed.
+
+A full XSD validation of OFMX is far too slow to run on every data
+update. Only the structure Impfix relies on is checked:
+
+* Dpn knots: DpnUid with codeId, geoLat and geoLong, and codeType
+* Ase knots: AseUid with codeType and codeId
+* gmlPosList: list of 'long,lat,value' triples
+
+The validator does not read the file itself, so the validation runs
+in the same pass as the extraction of the data. The parser which
+reads the file either
+
+* passes every complete Dpn and Ase knot to check_knot(), or
+* calls start(), data() and end() for every element (streaming
+  parsers which do not build the knots, e.g. for the shape extension).
+
+check_knot() only needs a few ElementTree lookups and regular
+expressions per knot, and the line number of a knot is only determined
+for stored error messages. Calling start(), data() and end() for every
+element costs a Python call per element and is much slower.
+"""
+
+import re
+
+## Pattern of a latitude, e.g. 47.33611111N
+_LAT_PATTERN = re.compile(r'\d{1,2}(\.\d+)?[NS]')
+## Pattern of a longitude, e.g. 009.62222222E
+_LONG_PATTERN = re.compile(r'\d{1,3}(\.\d+)?[EW]')
+## Pattern of a number in a gmlPosList triple
+_NUMBER = r'-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?'
+## Pattern of a gmlPosList triple, e.g. 16.11361111,46.86888889,0
+_TRIPLE_PATTERN = re.compile(r'{0},{0},{0}'.format(_NUMBER))
+## Pattern of a complete gmlPosList: triples separated by white space
+_POS_LIST_PATTERN = re.compile(r'\s*(?:{0},{0},{0}(?:\s+{0},{0},{0})*)?\s*'.format(_NUMBER))
+
+## Required child elements of the checked knots:
+## knot tag --> tuple of paths relative to the knot
+_REQUIRED_ELEMENTS: dict = {
+    'Dpn': ('DpnUid', 'DpnUid/codeId', 'DpnUid/geoLat', 'DpnUid/geoLong', 'codeType'),
+    'Ase': ('AseUid', 'AseUid/codeType', 'AseUid/codeId'),
+}
+## Required elements which contain other elements instead of text
+_CONTAINER_ELEMENTS: set = {'DpnUid', 'AseUid'}
+## Elements whose text is checked: path --> (pattern, description)
+_TEXT_PATTERNS: dict = {
+    'DpnUid/geoLat': (_LAT_PATTERN, 'latitude like 47.33611111N'),
+    'DpnUid/geoLong': (_LONG_PATTERN, 'longitude like 009.62222222E'),
+}
+
+class OFMXValidatorClass:
+    """Streaming structural validator for OFMX files."""
+    ## Tags of the checked knots (children of the root element)
+    checked_knots: frozenset = frozenset(_REQUIRED_ELEMENTS)
+
+    def __init__(self, file_name: str, max_errors: int = 20) -> None:
+        """
+        Args:
+            file_name (str): name of the checked file (for the messages)
+            max_errors (int): maximum number of stored error messages;
+                further errors are only counted
+        """
+        ## Name of the checked file
+        self.file_name: str = file_name
+        ## Maximum number of stored error messages
+        self.max_errors: int = max_errors
+        ## Error messages: 'file:line: message'
+        self.errors: list = []
+        ## Number of errors found (including errors not stored)
+        self.error_count: int = 0
+        # State of the knot which is checked at the moment
+        self._path: list = []
+        self._knot_tag: str = ''
+        self._knot_line: int = 0
+        self._knot_found: set = set()
+        self._text: list = []
+        self._pos_rest: str = ''
+
+    def _error(self, line, message: str) -> None:
+        """Store an error message (up to max_errors messages).
+
+        Args:
+            line: line number, or a function returning the line number
+                (only called if the message is stored)
+            message (str): error message
+        """
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            if callable(line):
+                line = line()
+            self.errors.append('{}:{}: {}'.format(self.file_name, line, message))
+
+    def check_knot(self, knot, line) -> bool:
+        """Check a complete Dpn or Ase knot.
+
+        Args:
+            knot (ET.Element): the knot
+            line: function returning the line number of the start tag
+                of the knot (only called for stored error messages)
+
+        Returns:
+            bool: True if no error was found in the knot
+        """
+        error_count = self.error_count
+        # found elements: path --> element (None if not found);
+        # find() with a single tag is much faster than with a path
+        found: dict = {'': knot}
+        for path in _REQUIRED_ELEMENTS[knot.tag]:
+            parent_path, _, tag = path.rpartition('/')
+            parent = found[parent_path]
+            element = found[path] = (parent.find(tag) if parent is not None else None)
+            if element is None:
+                self._error(line, '{} without {}'.format(knot.tag, path))
+                continue
+            text = (element.text or '').strip()
+            if path in _TEXT_PATTERNS:
+                pattern, description = _TEXT_PATTERNS[path]
+                if not pattern.fullmatch(text):
+                    self._error(line, '{}/{} \'{}\' is not a {}'.format(
+                        knot.tag, path, text, description))
+            elif not text and path not in _CONTAINER_ELEMENTS:
+                self._error(line, '{}/{} is empty'.format(knot.tag, path))
+        pos_list = knot.find('gmlPosList')
+        if pos_list is not None and pos_list.text \
+                and not _POS_LIST_PATTERN.fullmatch(pos_list.text):
+            # find the malformed triples only if there are any
+            for triple in pos_list.text.split():
+                if not _TRIPLE_PATTERN.fullmatch(triple):
+                    self._error(line, '{}/gmlPosList: \'{}\' is not a '
+                                '\'long,lat,value\' triple'.format(knot.tag, triple[:40]))
+        return self.error_count == error_count
+
+    def start(self, tag: str, line: int) -> None:
+        """Element start tag found in line."""
+        self._path.append(tag)
+        if len(self._path) == 2 and tag in _REQUIRED_ELEMENTS:
+            self._knot_tag = tag
+            self._knot_line = line
+            self._knot_found = set()
+        elif self._knot_tag and len(self._path) > 2:
+            self._knot_found.add('/'.join(self._path[2:]))
+        self._text = []
+
+    def data(self, text: str, line: int) -> None:
+        """Character data (or a part of it) found in line."""
+        if not self._knot_tag:
+            return
+        if self._path[-1] == 'gmlPosList':
+            self._check_positions(self._pos_rest + text, line)
+        else:
+            self._text.append(text)
+
+    def end(self, tag: str, line: int) -> None:
+        """Element end tag found in line."""
+        if self._knot_tag:
+            if len(self._path) == 2:
+                # end of knot: check the required elements
+                for path in _REQUIRED_ELEMENTS[self._knot_tag]:
+                    if path not in self._knot_found:
+                        self._error(self._knot_line, '{} without {}'
+                                    .format(self._knot_tag, path))
+                self._knot_tag = ''
+            else:
+                path = '/'.join(self._path[2:])
+                text = ''.join(self._text).strip()
+                if tag == 'gmlPosList':
+                    self._check_positions(self._pos_rest + ' ', line)
+                elif path in _TEXT_PATTERNS:
+                    pattern, description = _TEXT_PATTERNS[path]
+                    if not pattern.fullmatch(text):
+                        self._error(line, '{}/{} \'{}\' is not a {}'.format(
+                            self._knot_tag, path, text, description))
+                elif path in _REQUIRED_ELEMENTS[self._knot_tag] and not text \
+                        and path not in _CONTAINER_ELEMENTS:
+                    self._error(line, '{}/{} is empty'.format(self._knot_tag, path))
+        self._text = []
+        self._path.pop()
+
+    def _check_positions(self, text: str, line: int) -> None:
+        """Check the triples of a gmlPosList (or a part of it).
+
+        The incomplete last triple is kept until the next part arrives.
+        """
+        triples = text.split()
+        if triples and not text[-1].isspace():
+            self._pos_rest = triples.pop()
+        else:
+            self._pos_rest = ''
+        for triple in triples:
+            if not _TRIPLE_PATTERN.fullmatch(triple):
+                self._error(line, '{}/gmlPosList: \'{}\' is not a '
+                            '\'long,lat,value\' triple'.format(self._knot_tag, triple[:40]))
+
+    @property
+    def is_valid(self) -> bool:
+        return self.error_count == 0
+
+    def error_messages(self) -> list:
+        """Return the stored error messages and the number of the
+        errors not stored."""
+        messages = list(self.errors)
+        if self.error_count > len(self.errors):
+            messages.append('... {} more errors'.format(self.error_count - len(self.errors)))
+        return messages
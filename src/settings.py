@@ -2,6 +2,13 @@
 Set all needed environment data, parse command line and store
 command line data.
 
+The command line is only parsed by SettingsClass.from_command_line().
+Creating a SettingsClass object directly has no side effects, so
+Impfix can be used as a library:
+
+    impfix_settings = SettingsClass('ofmx_lo.ofmx', '/Applications/X-Plane 11',
+                                    validate=True)
+
 * Impfix version and hello information
 * Operating system platform and directory separation char
 * Command line parameters
@@ -9,6 +16,20 @@ command line data.
 
 import sys, argparse
 
+def _positive_int(text: str) -> int:
+    """argparse type: integer greater than 0."""
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError('{} is not greater than 0'.format(text))
+    return value
+
+def _positive_float(text: str) -> float:
+    """argparse type: number greater than 0."""
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError('{} is not greater than 0'.format(text))
+    return value
+
 class SettingsClass:
     """Set all needed environment data, parse command line and store
     command line data.
@@ -25,9 +46,28 @@ class SettingsClass:
     __cls_impfix_hello_2: str = 'Add Open Flight Maps data to X-Plane.\n'
     ## Name extension for new user_fix.dat file
     __cls_new_name_ext: str = '.impfix'
+    ## Attributes which can be set as options (the command line
+    ## parameters); all other attributes are derived from them
+    __cls_options: frozenset = frozenset({
+        'verbose', 'OFM_file_url', 'filter_by_rp_type', 'filter_by_airport_icao_id',
+        'pipeline', 'export_file_name', 'validate', 'max_errors', 'max_memory'})
 
-    def __init__(self):
-        """Initialise data attributes and parse command line."""        
+    def __init__(self, ofm_file_name: str = '', xplane_path: str = '',
+                 **options) -> None:
+        """Initialise data attributes.
+
+        Args:
+            ofm_file_name (str): filename of Open Flight Map file
+            xplane_path (str): path to X-Plane directory
+            **options: values of the attributes set by command line
+                parameters, e.g. verbose=True, pipeline=True,
+                export_file_name='lo.nav'
+
+        Raises:
+            TypeError: unknown option
+            ValueError: max_errors is less than 1 or max_memory is
+                negative
+        """
         # Attributes
         ## Complete Impfix Hello message
         self.impfix_hello = self.__cls_impfix_hello_1 + self.impfix_version \
@@ -35,13 +75,25 @@ class SettingsClass:
         ## Verbose Output during execution
         self.verbose: bool = False
         ## Filename of Open Flight Map file inkluding path
-        self.OFM_file_name = ''
+        self.OFM_file_name = ofm_file_name
         ## URL of the Open Flight Maps file
         self.OFM_file_url = ''
         ## Filter by reporting point type
         self.filter_by_rp_type = []
         ## Filter by airport's ICAO id
         self.filter_by_airport_icao_id = ''
+        ## Parse the OFMX file while the old user_fix.dat is copied
+        self.pipeline: bool = False
+        ## Filename of the binary navdata export file including path
+        self.export_file_name = ''
+        ## Check the structure of the OFMX file while it is parsed
+        self.validate: bool = False
+        ## Maximum number of reported errors of the validation
+        self.max_errors: int = 20
+        ## Memory budget in MB for the reporting point data held in
+        ## memory; the OFMX file is then processed in chunks
+        ## (0 = no budget)
+        self.max_memory: float = 0
         ## Directory separation character
         self.dir_separator = ''
         ## Path and name of X-Plane directory
@@ -75,10 +127,19 @@ class SettingsClass:
             self.dir_separator = '/'
             self.__xplane_path = '/Application/X-Plane 11'
             self.__xplane_user_fix_dat_subdirectory = 'Custom Data/user_fix.dat'
-        
-        # Parse the command line and set attribute values from command
-        # line parameters
-        self._parse_command_line()
+        self.__xplane_path = xplane_path
+
+        # Set attribute values from options (e.g. command line
+        # parameters)
+        for name, value in options.items():
+            if name not in self.__cls_options:
+                raise TypeError('SettingsClass: unknown option \'{}\''.format(name))
+            setattr(self, name, value)
+        if self.max_errors < 1:
+            raise ValueError('SettingsClass: max_errors must be at least 1')
+        if not self.max_memory >= 0:
+            raise ValueError('SettingsClass: max_memory must not be negative '
+                             '(0 = no memory budget)')
 
         # Set path and filename of X-Plane user_fix.dat
         # e.g.   xplane_path = 'c:/x-plane 11'
@@ -113,11 +174,25 @@ class SettingsClass:
             return xplane_path + sub_path
 
 
-    def _parse_command_line(self):
-        """Parse command line und store parameters in attributes.
+    @classmethod
+    def from_command_line(cls, argv: list = None) -> 'SettingsClass':
+        """Parse command line and create the settings from it.
+
+        Args:
+            argv (list): command line arguments without program name,
+                default is sys.argv[1:]
+        """
+        return cls(**cls._parse_command_line(argv))
+
+    @classmethod
+    def _parse_command_line(cls, argv: list = None) -> dict:
+        """Parse command line und return parameters as options.
 
         usage: Impfix [-h] [-v] [--data {MRP}] [--icao ICAO] 
-                      [--xplanepath XPLANEPATH] [-vv] ofmfile
+                      [--xplanepath XPLANEPATH] [--pipeline]
+                      [--export EXPORT] [--validate]
+                      [--max-errors MAX_ERRORS] [--max-memory MB]
+                      [-vv] ofmfile
 
         Add Open Flightmap data to X-Plane.
 
@@ -131,17 +206,29 @@ class SettingsClass:
         --icao ICAO           filter by airport's ICAO code
         --xplanepath XPLANEPATH
                                 path to X-Plane directory
+        --pipeline            parse OFM file in a separate process while
+                              copying old user_fix.dat (needs 2 CPUs, not
+                              with --max-memory)
+        --export EXPORT       export navdata into binary file EXPORT
+        --validate            check structure of OFM file while parsing
+                              (parsing takes about 1.5 times as long)
+        --max-errors MAX_ERRORS
+                                maximum number of reported validation errors
+        --max-memory MB       keep at most MB megabytes of reporting point
+                              data in memory by processing the OFM file in
+                              chunks (a data budget, Python itself and the
+                              XML parser need memory in addition)
         -vv, --verbose        show verbose output
 
         GitLab: https://gitlab.com/charraeus/impfix
         """
         parser = argparse.ArgumentParser(
-            description=self.__cls_impfix_hello_2,
+            description=cls.__cls_impfix_hello_2,
             prog='Impfix',
             epilog='GitLab: https://gitlab.com/charraeus/impfix')
         parser.add_argument('-v', '--version', 
             help='Print version and exit',
-            action='version', version='%(prog)s Version ' + self.impfix_version)
+            action='version', version='%(prog)s Version ' + cls.impfix_version)
         parser.add_argument('ofmfile', help='OpenFlightMap file')
         parser.add_argument('--data', 
             help='filter by reporting point type (MRP, RP, ICAO)', 
@@ -152,13 +239,36 @@ class SettingsClass:
             help='filter by airport\'s ICAO code')
         parser.add_argument('--ofmurl', help='URL for download of Open Flight Maps data')
         parser.add_argument('--xplanepath', help='path to X-Plane directory')
+        parser.add_argument('--pipeline',
+            help='parse OFM file in a separate process while copying old '
+                 'user_fix.dat (needs 2 CPUs, not with --max-memory)',
+            action='store_true')
+        parser.add_argument('--export',
+            help='export navdata into binary file EXPORT')
+        parser.add_argument('--validate',
+            help='check structure of OFM file while parsing '
+                 '(parsing takes about 1.5 times as long)',
+            action='store_true')
+        parser.add_argument('--max-errors', type=_positive_int, default=20,
+            help='maximum number of reported validation errors')
+        parser.add_argument('--max-memory', type=_positive_float, default=0, metavar='MB',
+            help='keep at most MB megabytes of reporting point data in memory '
+                 'by processing the OFM file in chunks (a data budget, Python '
+                 'itself and the XML parser need memory in addition)')
         parser.add_argument('-vv', '--verbose', 
             help='show verbose output',
             action='store_true')
-        args = parser.parse_args()  
-        self.filter_by_rp_type = (args.data if args.data is not None else '')
-        self.filter_by_airport_icao_id = (args.icao if args.icao is not None else '')
-        self.OFM_file_name = args.ofmfile
-        self.OFM_file_url = (args.ofmurl if args.ofmurl is not None else '')
-        self.__xplane_path = (args.xplanepath if args.xplanepath is not None else '')
-        self.verbose = (args.verbose if args.verbose is not None else '')
+        args = parser.parse_args(argv)
+        return {
+            'ofm_file_name': args.ofmfile,
+            'xplane_path': (args.xplanepath if args.xplanepath is not None else ''),
+            'filter_by_rp_type': (args.data if args.data is not None else ''),
+            'filter_by_airport_icao_id': (args.icao if args.icao is not None else ''),
+            'OFM_file_url': (args.ofmurl if args.ofmurl is not None else ''),
+            'pipeline': args.pipeline,
+            'export_file_name': (args.export if args.export is not None else ''),
+            'validate': args.validate,
+            'max_errors': args.max_errors,
+            'max_memory': args.max_memory,
+            'verbose': args.verbose,
+        }
@@ -9,11 +9,18 @@ Create and write new user_fix.dat file.
 * Backup the old user_fix.dat file
 """
 
-import sys
+from __future__ import annotations
+
+import os
 from datetime import datetime
+from typing import TYPE_CHECKING
+
+from impfix_errors import ImpfixError
 
-from ofmx_data import OFMXFileClass
-from settings import SettingsClass
+if TYPE_CHECKING:
+    # only needed for type annotations
+    from ofmx_data import OFMXFileClass
+    from settings import SettingsClass
 
 class XPlaneNavDataClass:
     ## Nach dieser Marke beginnen die von Impfix erzeugten Daten
@@ -25,14 +32,23 @@ class XPlaneNavDataClass:
     __ImpfixEndMark: str = ';- DO NOT EDIT ABOVE THIS LINE! --End Impfix-ofmx-data:'
 
     def __init__(self, impfix_settings: SettingsClass) -> None:
+        """
+        Raises:
+            ImpfixError: the user_fix.dat file cannot be opened or the
+                new user_fix.dat file cannot be created
+        """
         ## Settings information
         self.__settings_: SettingsClass = impfix_settings
         ## File object for existing user_fix.dat file
         self._xplane_user_fix_dat_file = \
             self._open_user_fix_dat_file(impfix_settings.xplane_user_fix_dat_filename)
         ## File object for new user_fix.dat.impfix file
-        self._new_user_fix_dat_file = \
-            self._create_new_user_fix_dat_file(impfix_settings.new_user_fix_dat_filename)
+        try:
+            self._new_user_fix_dat_file = \
+                self._create_new_user_fix_dat_file(impfix_settings.new_user_fix_dat_filename)
+        except ImpfixError:
+            self._xplane_user_fix_dat_file.close()
+            raise
 
     def _create_new_user_fix_dat_file(self, filename):
         """Create the **new** user_fix.dat file
@@ -44,27 +60,17 @@ class XPlaneNavDataClass:
         try:
             return open(filename, 'w')
         except IOError as e:
-            errno, strerror = e.args
-            print('**I/O error({}): {}'.format(errno, strerror))
-            print('**Error while creating the file \'{}\''.format(filename))
-            exit()
-        except:
-            print('**Unknown error:\n', sys.exc_info()[0:2])
-            exit()
+            raise ImpfixError('I/O error({}): {}'.format(e.errno, e.strerror),
+                              'Error while creating the file \'{}\''.format(filename)) from e
 
     def _open_user_fix_dat_file(self, filename):
         """Open the **existing** user_fix.dat file"""
         try:
             return open(str(filename), 'r')
         except IOError as e:
-            errno, strerror = e.args
-            print('**I/O error({0}): {1}'.format(errno,strerror))
-            print('**File not found: {0}'
-                .format(self.__settings_.xplane_user_fix_dat_filename))
-            exit()
-        except:
-            print('**Unknown error:\n', sys.exc_info()[0:2])
-            exit()
+            raise ImpfixError('I/O error({0}): {1}'.format(e.errno, e.strerror),
+                              'File not found: {0}'
+                              .format(self.__settings_.xplane_user_fix_dat_filename)) from e
 
 
     def write_new_user_fix_dat_file(self, ofmx_data: OFMXFileClass) -> None:
@@ -83,6 +89,19 @@ class XPlaneNavDataClass:
            the new user_fix.dat file.
         """
 
+        try:
+            self._copy_and_insert_ofmx_data(ofmx_data)
+        except BaseException:
+            # Do not leave a partially written new user_fix.dat file
+            # behind (e.g. if the OFMX file could not be parsed)
+            self._new_user_fix_dat_file.close()
+            self._xplane_user_fix_dat_file.close()
+            os.remove(self.__settings_.new_user_fix_dat_filename)
+            raise
+
+    def _copy_and_insert_ofmx_data(self, ofmx_data: OFMXFileClass) -> None:
+        """Copy the old user_fix.dat file and insert the OFMX data
+        (see write_new_user_fix_dat_file())."""
         xplane_userfix_dat_eof: str = '99'  # @todo noch in settings aufnehmen
         eof_mark_found: bool = False
         end_mark_found: bool = False
@@ -132,9 +151,6 @@ class XPlaneNavDataClass:
 
                 except StopIteration:
                     ofm_data_written = True
-                except:
-                    print('**Unexpected error:\n', sys.exc_info()[0:2])
-                    exit()
                 # Write new end mark
                 self._new_user_fix_dat_file.write(self.__ImpfixEndMark 
                         + 'XXXX' + ' ' + cur_datetime + '\n')
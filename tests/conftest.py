@@ -0,0 +1,88 @@
+"""Common fixtures for the Impfix tests."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'src'))
+
+from settings import SettingsClass
+
+## Old user_fix.dat with non-Impfix data, old Impfix data and end-of-file mark
+USER_FIX_DAT = '''I
+1101 Version - data cycle 1812, build 20181210, metadata FixXP1101.
+
+17.96083333\t-61.09500000\tPFJFO\t\tTFFJ\tTF
+;- DO NOT EDIT BELOW THIS LINE! --Start Impfix-ofmx-data:XXXX 2022-02-24 21:07:19:1645733239
+old data
+;- DO NOT EDIT ABOVE THIS LINE! --End Impfix-ofmx-data:XXXX 2022-02-24 21:07:19:1645733239
+99
+'''
+
+
+def ofmx_snapshot(dpns: list, effective: str = '2022-02-08T06:26:43') -> str:
+    """Return a synthetic OFMX snapshot.
+
+    Args:
+        dpns (list): one (airport, code_id, name, geo_lat, geo_long,
+            code_type) tuple per Dpn knot
+    """
+    lines = ['<?xml version="1.0" encoding="utf-8"?>',
+             '<OFMX-Snapshot version="0.1" effective="{}">'.format(effective)]
+    for airport, code_id, name, geo_lat, geo_long, code_type in dpns:
+        lines += ['  <Dpn>',
+                  '    <DpnUid region="LOVV">',
+                  '      <codeId>{}</codeId>'.format(code_id),
+                  '      <geoLat>{}</geoLat>'.format(geo_lat),
+                  '      <geoLong>{}</geoLong>'.format(geo_long),
+                  '    </DpnUid>',
+                  '    <AhpUidAssoc region="LOVV"><codeId>{}</codeId></AhpUidAssoc>'.format(airport),
+                  '    <codeType>{}</codeType>'.format(code_type),
+                  '    <txtName>{}</txtName>'.format(name),
+                  '  </Dpn>']
+    lines.append('</OFMX-Snapshot>')
+    return '\n'.join(lines) + '\n'
+
+
+## Reporting point ids and names, some ids are shortened to the same
+## five character id
+RP_IDS = [('E', 'ECHO'), ('N1', 'NOVEMBER 1'), ('AUTOBAHN OST', 'AUTOBAHN OST'),
+          ('LORENZEN', 'LORENZEN'), ('LORENZ', 'LORENZ'), ('S', 'SIERRA')]
+
+
+def many_dpns(count: int) -> list:
+    """Dpn knots of 40 airports; every fifth reporting point belongs to
+    LOIH, so its reporting points are spread over the whole file."""
+    dpns = []
+    for i in range(count):
+        airport = 'LOIH' if i % 5 == 0 else 'LO{:02d}'.format(i % 39)
+        code_id, name = RP_IDS[i % len(RP_IDS)]
+        dpns.append((airport, code_id, name, '47.{:06d}N'.format(i),
+                     '009.{:06d}E'.format(i), 'VFR-RP'))
+    return dpns
+
+
+def user_fix_dat_lines(impfix_settings) -> list:
+    """Lines of the new user_fix.dat file without the time stamps."""
+    with open(impfix_settings.new_user_fix_dat_filename) as user_fix_dat:
+        return [line for line in user_fix_dat if not line.startswith(';-')]
+
+
+@pytest.fixture
+def xplane_dir(tmp_path):
+    """X-Plane directory with an old user_fix.dat file."""
+    custom_data = tmp_path / 'X-Plane' / 'Custom Data'
+    custom_data.mkdir(parents=True)
+    (custom_data / 'user_fix.dat').write_text(USER_FIX_DAT)
+    return tmp_path / 'X-Plane'
+
+
+@pytest.fixture
+def make_settings(tmp_path, xplane_dir):
+    """Factory: write an OFMX snapshot and return settings for it."""
+    def make(dpns: list, **options) -> SettingsClass:
+        ofmx_file = tmp_path / 'snapshot.ofmx'
+        ofmx_file.write_text(ofmx_snapshot(dpns))
+        return SettingsClass(str(ofmx_file), str(xplane_dir), **options)
+    return make
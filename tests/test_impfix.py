@@ -0,0 +1,58 @@
+"""Tests for the Impfix library API and the command line entry point."""
+
+import os
+
+import pytest
+
+import impfix
+from impfix_errors import ImpfixError
+from settings import SettingsClass
+
+DPNS = [('LOIH', 'E', 'ECHO', '47.45833333N', '009.71944444E', 'VFR-MRP'),
+        ('LOIH', 'S', 'SIERRA', '47.33611111N', '009.62222222W', 'VFR-MRP'),
+        ('LOWS', 'HALLEIN', 'HALLEIN', '47.68N', '013.09E', 'VFR-RP'),
+        ('LOIH', 'X', 'XRAY', '47.1N', '009.1E', 'ICAO')]
+
+
+def test_generate_user_fix(make_settings):
+    impfix_settings = make_settings(DPNS)
+    impfix.generate_user_fix(impfix_settings)
+    with open(impfix_settings.new_user_fix_dat_filename) as user_fix_dat:
+        lines = user_fix_dat.read().splitlines()
+    assert lines[3] == '17.96083333\t-61.09500000\tPFJFO\t\tTFFJ\tTF'
+    assert lines[6:9] == ['\t47.45833333\t009.71944444\tECHO\t\tLOIH\tLO',
+                          '\t47.33611111\t-009.62222222\tSIERR\t\tLOIH\tLO',
+                          '\t47.68\t013.09\tHALLE\t\tLOWS\tLO']
+    assert lines[-1] == '99'
+
+
+def test_missing_ofmx_file(tmp_path, xplane_dir):
+    impfix_settings = SettingsClass(str(tmp_path / 'missing.ofmx'), str(xplane_dir))
+    with pytest.raises(ImpfixError) as error:
+        impfix.load_snapshot(impfix_settings)
+    assert error.value.args[1] == 'File not found: {}'.format(tmp_path / 'missing.ofmx')
+
+
+def test_missing_user_fix_dat(make_settings, xplane_dir):
+    impfix_settings = make_settings(DPNS)
+    os.remove(impfix_settings.xplane_user_fix_dat_filename)
+    with pytest.raises(ImpfixError, match='File not found'):
+        impfix.generate_user_fix(impfix_settings)
+    assert not os.path.exists(impfix_settings.new_user_fix_dat_filename)
+
+
+def test_invalid_ofmx_file_leaves_no_new_user_fix_dat(make_settings):
+    impfix_settings = make_settings(DPNS[:1] + [('LOIH', 'N', 'NOVEMBER', 'x', 'y', 'VFR-RP')],
+                                    validate=True)
+    with pytest.raises(ImpfixError, match='File not valid'):
+        impfix.generate_user_fix(impfix_settings)
+    assert not os.path.exists(impfix_settings.new_user_fix_dat_filename)
+
+
+def test_main_prints_error_and_exits(tmp_path, xplane_dir, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        impfix.main([str(tmp_path / 'missing.ofmx'), '--xplanepath', str(xplane_dir)])
+    assert exit_info.value.code == 1
+    output = capsys.readouterr().out.splitlines()
+    assert output[-2].startswith('**I/O error(2): ')
+    assert output[-1] == '**File not found: {}'.format(tmp_path / 'missing.ofmx')
@@ -0,0 +1,102 @@
+"""Tests for the binary navdata export and the memory-mapped loader."""
+
+import struct
+
+import pytest
+
+from navdata_binary import NavdataBinaryClass, NavdataBinaryExportClass, _HEADER_STRUCT
+
+numpy = pytest.importorskip('numpy')
+
+
+class FakeOFMXData:
+    """Minimal OFMXFileClass interface for the export."""
+
+    def __init__(self, reporting_points: list, effective: str = '2022-02-08T06:26:43'):
+        self.OFMX_meta_data = {'effective': effective}
+        self._reporting_points = reporting_points
+
+    def get_reporting_point(self):
+        yield from self._reporting_points
+
+
+REPORTING_POINTS = [
+    ['LOVV', 'LOIH', 'E', 'VFR-MRP', 'ECHO', ['47.45833333', '9.71944444'], 'ECHO', 'LO'],
+    ['LOVV', 'LOIH', 'S', 'VFR-MRP', 'SIERRA', ['47.33611111', '-9.62222222'], 'SIERR', 'LO'],
+    ['LOVV', 'LOWS', 'HALLEIN', 'VFR-RP', 'HALLEIN', ['', ''], 'HALLE', 'LO'],
+]
+
+
+def export(tmp_path, reporting_points):
+    filename = str(tmp_path / 'lo.nav')
+    NavdataBinaryExportClass(None).write(FakeOFMXData(reporting_points), filename)
+    return filename
+
+
+def test_round_trip(tmp_path):
+    with NavdataBinaryClass(export(tmp_path, REPORTING_POINTS)) as navdata:
+        assert len(navdata) == 3
+        assert navdata.effective == '2022-02-08T06:26:43'
+        assert navdata.lat.dtype == numpy.float64
+        assert not navdata.lat.flags.owndata      # view into the memory map
+        assert navdata.lat[:2].tolist() == [47.45833333, 47.33611111]
+        assert navdata.long[1] == -9.62222222
+        assert numpy.isnan(navdata.lat[2])
+        assert navdata.strings('rp_id5') == ['ECHO', 'SIERR', 'HALLE']
+        # interned strings: 'LOVV' is stored once
+        assert len(set(navdata.column('region').tolist())) == 1
+        loaded = list(navdata.get_reporting_point())
+    assert [rp[:5] + rp[6:] for rp in loaded] == [rp[:5] + rp[6:] for rp in REPORTING_POINTS]
+
+
+def test_round_trip_without_reporting_points(tmp_path):
+    with NavdataBinaryClass(export(tmp_path, [])) as navdata:
+        assert len(navdata) == 0
+        assert navdata.lat.tolist() == []
+        assert navdata.strings('airport') == []
+        assert list(navdata.get_reporting_point()) == []
+
+
+def test_truncated_file(tmp_path):
+    filename = tmp_path / 'short.nav'
+    filename.write_bytes(b'IMPFIXNB')
+    with pytest.raises(ValueError, match='too short'):
+        NavdataBinaryClass(str(filename))
+
+
+def test_wrong_version(tmp_path):
+    filename = export(tmp_path, REPORTING_POINTS)
+    with open(filename, 'r+b') as navdata_file:
+        navdata_file.seek(8)
+        navdata_file.write(struct.pack('<H', 7))
+    with pytest.raises(ValueError, match='version 7'):
+        NavdataBinaryClass(filename)
+
+
+def test_no_navdata_file(tmp_path):
+    filename = tmp_path / 'other.bin'
+    filename.write_bytes(b'\0' * _HEADER_STRUCT.size)
+    with pytest.raises(ValueError, match='not a binary navdata file'):
+        NavdataBinaryClass(str(filename))
+
+
+def test_reexport_while_loaded(tmp_path):
+    filename = export(tmp_path, REPORTING_POINTS)
+    with NavdataBinaryClass(filename) as navdata:
+        # replaces the file instead of truncating the mapped file
+        NavdataBinaryExportClass(None).write(FakeOFMXData(REPORTING_POINTS[:1]), filename)
+        assert len(navdata) == 3
+        assert navdata.lat[1] == 47.33611111
+        assert navdata.strings('rp_id5') == ['ECHO', 'SIERR', 'HALLE']
+    with NavdataBinaryClass(filename) as navdata:
+        assert navdata.strings('rp_id5') == ['ECHO']
+    assert [path.name for path in tmp_path.iterdir()] == ['lo.nav']
+
+
+def test_view_kept_after_close(tmp_path):
+    navdata = NavdataBinaryClass(export(tmp_path, REPORTING_POINTS))
+    with navdata:
+        lat = navdata.lat
+    assert navdata._navdata_file.closed
+    assert lat[:2].tolist() == [47.45833333, 47.33611111]
+    del lat
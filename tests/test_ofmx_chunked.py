@@ -0,0 +1,106 @@
+"""Tests for the chunked processing with a memory budget (--max-memory)."""
+
+import gc
+import os
+import tempfile
+import warnings
+
+import pytest
+
+import impfix
+from impfix_errors import ImpfixError
+from ofmx_chunked import OFMXChunkedFileClass
+from conftest import many_dpns, user_fix_dat_lines
+from settings import SettingsClass
+
+BAD_DPNS = [('LOIH', 'E', 'ECHO', '47.45833333N', '009.71944444E', 'VFR-MRP'),
+            ('LOIH', 'S', 'SIERRA', '47.33611111N', 'x', 'VFR-MRP')]
+
+
+def test_invalid_knot_is_reported(make_settings):
+    impfix_settings = make_settings(BAD_DPNS, validate=True, max_memory=1)
+    with pytest.raises(ImpfixError) as error:
+        impfix.generate_user_fix(impfix_settings)
+    assert error.value.args[0].endswith(':13: Dpn/DpnUid/geoLong \'x\' is not a '
+                                        'longitude like 009.62222222E')
+    assert error.value.args[-1].startswith('File not valid: ')
+    assert not os.path.exists(impfix_settings.new_user_fix_dat_filename)
+
+
+def test_missing_ofmx_file(tmp_path, xplane_dir):
+    impfix_settings = SettingsClass(str(tmp_path / 'missing.ofmx'), str(xplane_dir),
+                                    max_memory=1)
+    with pytest.raises(ImpfixError) as error:
+        impfix.load_snapshot(impfix_settings)
+    assert error.value.args[0].startswith('I/O error(2): ')
+    assert error.value.args[1] == 'File not found: {}'.format(tmp_path / 'missing.ofmx')
+
+
+@pytest.mark.parametrize('valid', [True, False])
+def test_temporary_files_are_deleted(make_settings, tmp_path, monkeypatch, valid):
+    temp_dir = tmp_path / 'temp'
+    temp_dir.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(temp_dir))
+    impfix_settings = make_settings(many_dpns(500) + BAD_DPNS[:1 if valid else 2],
+                                    validate=True, max_memory=0.1)
+    with warnings.catch_warnings(record=True) as warning_list:
+        # a TemporaryDirectory which is not cleaned up explicitly is
+        # cleaned up by its finalizer with a ResourceWarning
+        warnings.simplefilter('always')
+        try:
+            impfix.generate_user_fix(impfix_settings)
+        except ImpfixError:
+            assert not valid
+        gc.collect()
+    assert [w for w in warning_list if issubclass(w.category, ResourceWarning)] == []
+    assert list(temp_dir.iterdir()) == []
+
+
+@pytest.mark.parametrize('max_memory', [0.25, 100])
+def test_same_result_as_without_budget(make_settings, max_memory):
+    impfix_settings = make_settings(many_dpns(3000))
+    impfix.generate_user_fix(impfix_settings)
+    expected = user_fix_dat_lines(impfix_settings)
+    assert len(expected) > 3000
+
+    impfix_settings.max_memory = max_memory
+    with impfix.load_snapshot(impfix_settings) as ofmx_data:
+        if max_memory < 1:
+            # LOIH is in every spill
+            assert ofmx_data.spill_count > 3
+            assert len(ofmx_data._chunks) > 1
+        else:
+            assert ofmx_data.spill_count == 0
+        impfix.generate_user_fix(impfix_settings, ofmx_data)
+    assert user_fix_dat_lines(impfix_settings) == expected
+
+
+@pytest.mark.parametrize('max_memory', [1, 0.25])
+def test_memory_budget(make_settings, monkeypatch, capsys, max_memory):
+    impfix_settings = make_settings(many_dpns(3000), max_memory=max_memory)
+    budget = max_memory * 1024 * 1024
+    buffered_sizes: list = []
+    spill_buckets = OFMXChunkedFileClass._spill_buckets
+
+    def spy(self):
+        buffered_sizes.append(self._buffered_size)
+        spill_buckets(self)
+
+    monkeypatch.setattr(OFMXChunkedFileClass, '_spill_buckets', spy)
+    with impfix.load_snapshot(impfix_settings) as ofmx_data:
+        # spilled as soon as the budget is reached
+        assert len(buffered_sizes) > 1
+        assert max(buffered_sizes) < budget + 2000
+        chunk_sizes = [sum(ofmx_data._bucket_sizes[b] for b in buckets)
+                       for buckets in ofmx_data._chunks]
+        mean_rp_size = sum(chunk_sizes) / ofmx_data.rp_count
+        assert ofmx_data._batch_size * len(chunk_sizes) * mean_rp_size <= budget / 2
+    warning = capsys.readouterr().out.splitlines()[1:]
+    if max_memory == 1:
+        assert max(chunk_sizes) <= budget / 2
+        assert warning == []
+    else:
+        # the 600 reporting points of LOIH cannot be split
+        assert len([size for size in chunk_sizes if size > budget / 2]) == 1
+        assert warning[0] == ('**Warning: the reporting points of the same airports need '
+                              'up to 0.3 MB, more than half of the memory budget')
@@ -0,0 +1,38 @@
+"""Tests for the pipelined execution mode (--pipeline)."""
+
+import pytest
+
+import impfix
+from conftest import many_dpns, user_fix_dat_lines
+from impfix_errors import ImpfixError
+from navdata_binary import NavdataBinaryExportClass
+from ofmx_pipeline import OFMXPipelineClass
+from xplane_navdata import XPlaneNavDataClass
+
+BAD_DPNS = [('LOIH', 'E', 'ECHO', '47.45833333N', '009.71944444E', 'VFR-MRP'),
+            ('LOIH', 'S', 'SIERRA', '47.33611111N', 'x', 'VFR-MRP')]
+
+
+def test_same_result_as_without_pipeline(make_settings, tmp_path):
+    # generate_user_fix() only uses the pipeline with more than one CPU,
+    # so the pipeline is used directly here
+    impfix_settings = make_settings(many_dpns(2000),
+                                    export_file_name=str(tmp_path / 'lo.nav'))
+    impfix.generate_user_fix(impfix_settings)
+    expected_user_fix_dat = user_fix_dat_lines(impfix_settings)
+    expected_export = (tmp_path / 'lo.nav').read_bytes()
+
+    impfix_settings.export_file_name = str(tmp_path / 'lo-pipeline.nav')
+    with OFMXPipelineClass(impfix_settings) as ofmx_data:
+        ofmx_data.start()
+        XPlaneNavDataClass(impfix_settings).write_new_user_fix_dat_file(ofmx_data)
+        NavdataBinaryExportClass(impfix_settings).write(ofmx_data)
+    assert user_fix_dat_lines(impfix_settings) == expected_user_fix_dat
+    assert (tmp_path / 'lo-pipeline.nav').read_bytes() == expected_export
+
+
+def test_invalid_knot_is_reported(make_settings):
+    with OFMXPipelineClass(make_settings(BAD_DPNS, validate=True)) as pipeline:
+        pipeline.start()
+        with pytest.raises(ImpfixError, match='File not valid'):
+            list(pipeline.get_reporting_point())
@@ -0,0 +1,123 @@
+"""Tests for the streaming reader of the OFMX shape extension."""
+
+from array import array
+
+import pytest
+
+import impfix
+from impfix_errors import ImpfixError
+from ofmx_shapes import OFMXShapeClass, simplify_douglas_peucker
+from ofmx_validator import OFMXValidatorClass
+from settings import SettingsClass
+
+CHUNK_SIZE = 64 * 1024
+
+
+def shape_file(tmp_path, pos_list: str, offset_in_pos_list: int = 0) -> str:
+    """Write a shape extension file with one Ase knot.
+
+    The file is padded so that the character offset_in_pos_list of the
+    gmlPosList lies at the first 64 KiB chunk boundary.
+    """
+    head = ('<?xml version="1.0" encoding="utf-8"?>\n'
+            '<OFMX-Snapshot version="0.1" effective="2022-02-08T06:26:43">\n'
+            '<!--{}-->\n'
+            '  <Ase mid="519b1513">\n'
+            '    <AseUid mid="519b1513">\n'
+            '      <codeType>FIR</codeType>\n'
+            '      <codeId>LOVV</codeId>\n'
+            '    </AseUid>\n'
+            '    <gmlPosList>')
+    tail = '</gmlPosList>\n  </Ase>\n</OFMX-Snapshot>\n'
+    padding = CHUNK_SIZE - len(head.format('')) - offset_in_pos_list
+    assert padding >= 0
+    content = head.format('x' * padding) + pos_list + tail
+    assert content[CHUNK_SIZE - 1:CHUNK_SIZE + 1] == pos_list[offset_in_pos_list - 1:offset_in_pos_list + 1]
+    filename = tmp_path / 'shapes.xml'
+    filename.write_text(content)
+    return str(filename)
+
+
+def positions(count: int) -> tuple:
+    long = [16.0 + i / 1000 for i in range(count)]
+    lat = [46.0 + i / 3000 for i in range(count)]
+    return long, lat, ' '.join('{!r},{!r},{}'.format(x, y, i) for i, (x, y) in enumerate(zip(long, lat)))
+
+
+def test_closed_polygon_is_simplified():
+    # square with a vertex in the middle of every side, first = last vertex
+    long = array('d', [0, 0.5, 1, 1, 1, 0.5, 0, 0, 0])
+    lat = array('d', [0, 0, 0, 0.5, 1, 1, 1, 0.5, 0])
+    long, lat = simplify_douglas_peucker(long, lat, 0.1)
+    assert list(zip(long, lat)) == [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+
+
+def test_no_simplification_without_tolerance():
+    long, lat = array('d', [0, 0.5, 1]), array('d', [0, 0, 0])
+    assert simplify_douglas_peucker(long, lat, 0) == (long, lat)
+
+
+@pytest.mark.parametrize('offset', [1, 3, 9, 15])
+@pytest.mark.parametrize('validate', [False, True])
+def test_triple_split_at_chunk_boundary(tmp_path, offset, validate):
+    # offset 1: boundary after the first digit, 3: inside the first
+    # number, 9: at the first comma, 15: inside the second number
+    long, lat, pos_list = positions(5000)
+    filename = shape_file(tmp_path, pos_list, offset)
+    validator = OFMXValidatorClass(filename) if validate else None
+    shapes = OFMXShapeClass(None, filename, validator=validator)
+    shapes.read_and_parse()
+    [shape] = list(shapes.get_shape())
+    assert (shape.code_type, shape.code_id) == ('FIR', 'LOVV')
+    assert shape.long.tolist() == long
+    assert shape.lat.tolist() == lat
+    if validate:
+        assert validator.is_valid, validator.errors
+
+
+def test_malformed_triple(tmp_path):
+    filename = shape_file(tmp_path, '16.1,46.8,0 16.2;46.9,0 16.3,47.0,0', 1)
+    with pytest.raises(ImpfixError) as error:
+        OFMXShapeClass(None, filename).read_and_parse()
+    assert 'LOVV is not a list of' in error.value.args[0]
+    assert error.value.args[-1] == 'File not valid: {}'.format(filename)
+
+
+def test_malformed_triples_with_validator(tmp_path):
+    filename = shape_file(tmp_path, '1,2,0 3,4 16.2;46.9,0', 1)
+    validator = OFMXValidatorClass(filename)
+    with pytest.raises(ImpfixError) as error:
+        OFMXShapeClass(None, filename, validator=validator).read_and_parse()
+    messages = error.value.args
+    assert len(messages) == 3
+    assert "'3,4' is not a 'long,lat,value' triple" in messages[0]
+    assert "'16.2;46.9,0' is not a 'long,lat,value' triple" in messages[1]
+    assert messages[2] == 'File not valid: {}'.format(filename)
+
+
+def test_xml_error(tmp_path):
+    filename = tmp_path / 'shapes.xml'
+    filename.write_text('<OFMX-Snapshot><Ase></OFMX-Snapshot>')
+    with pytest.raises(ImpfixError) as error:
+        OFMXShapeClass(None, str(filename)).read_and_parse()
+    assert error.value.args[0].startswith('XML error: mismatched tag')
+    assert error.value.args[1] == 'File not readable: {}'.format(filename)
+
+
+@pytest.mark.parametrize('validate', [False, True])
+def test_load_shapes(tmp_path, validate):
+    long, lat, pos_list = positions(5)
+    filename = shape_file(tmp_path, pos_list, 1)
+    impfix_settings = SettingsClass('', str(tmp_path), validate=validate)
+    shapes = impfix.load_shapes(impfix_settings, filename, tolerance=1.0)
+    [shape] = list(shapes.get_shape())
+    assert shape.long.tolist() == [long[0], long[-1]]
+
+    filename = shape_file(tmp_path, '1,2,0 3,4', 1)
+    with pytest.raises(ImpfixError) as error:
+        impfix.load_shapes(impfix_settings, filename)
+    assert error.value.args[-1] == 'File not valid: {}'.format(filename)
+    if validate:
+        assert "'3,4' is not a 'long,lat,value' triple" in error.value.args[0]
+    else:
+        assert 'LOVV is not a list of' in error.value.args[0]
@@ -0,0 +1,79 @@
+"""Tests for the structural validation of OFMX files."""
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from impfix_errors import ImpfixError
+from ofmx_data import OFMXFileClass
+from ofmx_validator import OFMXValidatorClass
+
+## Line of the first Dpn knot and number of lines per Dpn knot in
+## conftest.ofmx_snapshot()
+FIRST_LINE, KNOT_LINES = 3, 10
+
+
+def dpns(count: int, bad: tuple = ()) -> list:
+    """Dpn knots, the knots in bad have a malformed latitude."""
+    return [('LOIH', 'E{}'.format(i), 'ECHO', '47.1X' if i in bad else '47.1N',
+             '009.6E', 'VFR-RP') for i in range(count)]
+
+
+def test_valid_file(make_settings):
+    ofmx_data = OFMXFileClass(make_settings(dpns(10), validate=True))
+    assert ofmx_data._validator.is_valid
+
+
+def test_line_numbers(make_settings):
+    # about 1 MB: the bad knots are spread over several parser blocks
+    bad = (0, 7, 1000, 2999)
+    impfix_settings = make_settings(dpns(3000, bad), validate=True)
+    with pytest.raises(ImpfixError) as error:
+        OFMXFileClass(impfix_settings)
+    assert error.value.args == tuple(
+        '{}:{}: Dpn/DpnUid/geoLat \'47.1X\' is not a latitude like 47.33611111N'
+        .format(impfix_settings.OFM_file_name, FIRST_LINE + KNOT_LINES * i)
+        for i in bad) + ('File not valid: {}'.format(impfix_settings.OFM_file_name),)
+
+
+def test_error_cap(make_settings):
+    impfix_settings = make_settings(dpns(50, tuple(range(0, 50, 2))),
+                                    validate=True, max_errors=3)
+    with pytest.raises(ImpfixError) as error:
+        OFMXFileClass(impfix_settings)
+    errors = error.value.args
+    assert len(errors) == 5
+    assert errors[2].startswith('{}:{}:'.format(impfix_settings.OFM_file_name,
+                                                FIRST_LINE + KNOT_LINES * 4))
+    assert errors[3] == '... 22 more errors'
+
+
+def test_line_number_only_for_stored_errors():
+    lines: list = []
+
+    def line() -> int:
+        lines.append(1)
+        return 42
+
+    validator = OFMXValidatorClass('lo.ofmx', max_errors=1)
+    knot = ET.fromstring('<Dpn><codeType>VFR-RP</codeType></Dpn>')
+    assert not validator.check_knot(knot, line)
+    assert validator.errors == ['lo.ofmx:42: Dpn without DpnUid']
+    assert validator.error_count == 4
+    assert len(lines) == 1
+
+
+@pytest.mark.parametrize('pos_list, errors', [
+    ('16.1,46.8,0 16.2,46.9,0\n  16.3,47.0,1e-3 ', []),
+    ('', []),
+    ('16.1,46.8,0 16.2;46.9,0 16.3,47.0', ["'16.2;46.9,0'", "'16.3,47.0'"]),
+])
+def test_pos_list(pos_list, errors):
+    validator = OFMXValidatorClass('shapes.xml')
+    knot = ET.fromstring('<Ase><AseUid><codeType>FIR</codeType><codeId>LOVV</codeId>'
+                         '</AseUid><gmlPosList>{}</gmlPosList></Ase>'.format(pos_list))
+    assert validator.check_knot(knot, lambda: 1) == (not errors)
+    assert [e.split(': ')[1].split(' is')[0] for e in validator.errors] == \
+        ['Ase/gmlPosList'] * len(errors)
+    for error, triple in zip(validator.errors, errors):
+        assert triple in error
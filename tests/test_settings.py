@@ -0,0 +1,54 @@
+"""Tests for the settings and the command line parsing."""
+
+import pytest
+
+from settings import SettingsClass
+
+
+def test_command_line():
+    impfix_settings = SettingsClass.from_command_line(
+        ['lo.ofmx', '--xplanepath', '/X-Plane', '--max-memory', '0.5',
+         '--max-errors', '3', '--validate'])
+    assert impfix_settings.OFM_file_name == 'lo.ofmx'
+    assert impfix_settings.max_memory == 0.5
+    assert impfix_settings.max_errors == 3
+    assert impfix_settings.validate
+    assert impfix_settings.new_user_fix_dat_filename == \
+        '/X-Plane/Custom Data/user_fix.dat.impfix'
+
+
+def test_defaults():
+    impfix_settings = SettingsClass.from_command_line(['lo.ofmx'])
+    assert impfix_settings.max_memory == 0
+    assert impfix_settings.max_errors == 20
+
+
+@pytest.mark.parametrize('option, value', [
+    ('--max-memory', '-1'), ('--max-memory', '0'), ('--max-memory', 'nan'),
+    ('--max-errors', '0'), ('--max-errors', '-5'), ('--max-errors', 'x')])
+def test_command_line_rejects_value(option, value, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        SettingsClass.from_command_line(['lo.ofmx', option, value])
+    assert exit_info.value.code == 2
+    assert 'argument {}'.format(option) in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('options', [{'max_memory': -1}, {'max_memory': float('nan')},
+                                     {'max_errors': 0}])
+def test_rejects_value(options):
+    with pytest.raises(ValueError):
+        SettingsClass('lo.ofmx', '/X-Plane', **options)
+
+
+def test_command_line_options_are_accepted():
+    options = SettingsClass._parse_command_line(['lo.ofmx', '--xplanepath', '/X-Plane'])
+    impfix_settings = SettingsClass(**options)
+    assert impfix_settings.OFM_file_name == 'lo.ofmx'
+
+
+@pytest.mark.parametrize('name', ['xplane_user_fix_dat_filename', 'new_user_fix_dat_filename',
+                                  'impfix_hello', 'dir_separator', 'impfix_os',
+                                  '_SettingsClass__xplane_path', 'unknown'])
+def test_derived_attributes_are_rejected(name):
+    with pytest.raises(TypeError, match='unknown option'):
+        SettingsClass('lo.ofmx', '/X-Plane', **{name: 'x'})